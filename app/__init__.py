@@ -1,15 +1,44 @@
 import os
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
 from flask_cors import CORS
 from werkzeug.middleware.proxy_fix import ProxyFix
 from pymongo import MongoClient
 from dotenv import load_dotenv
+import orjson
+from app.utils.json import OrjsonProvider
+import atexit
 import logging
+import logging.handlers
+import queue
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Shared QueueListener, started once per process by setup_logging()
+_log_listener = None
+
+# Endpoints excluded from per-request access logging
+_SKIP_ENDPOINTS = frozenset({'health.health_check', 'static'})
+
+# Headers added to every response
+_SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Server', 'GenHealth.AI API'),
+)
+
+# Directories already created by this process
+_ready_dirs = set()
+
+def _ensure_dir(path):
+    if path and path not in _ready_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ready_dirs.add(path)
+
 def create_app():
     app = Flask(__name__)
     
@@ -18,19 +47,25 @@ def create_app():
     app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
     app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
     app.config['JSON_SORT_KEYS'] = False
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = False
+    app.json = OrjsonProvider(app)
     
     # Enable CORS with production settings
     CORS(app, 
          origins=['*'] if os.getenv('FLASK_ENV') == 'development' else [],
-         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-         allow_headers=['Content-Type', 'Authorization'])
+         methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+         # Content-Range for resumable chunks, X-Filename for streamed uploads,
+         # If-None-Match for conditional document polls
+         allow_headers=['Content-Type', 'Authorization', 'Content-Range', 'X-Filename', 'If-None-Match'],
+         expose_headers=['Location', 'ETag'],
+         max_age=86400,
+         supports_credentials=False)
     
     # Add proxy fix for AWS load balancers
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
     
     # Setup logging
-    setup_logging()
+    setup_logging(app)
     
     # Add request/response middleware
     setup_middleware(app)
@@ -39,6 +74,8 @@ def create_app():
     setup_error_handlers(app)
     
     # Initialize MongoDB connection
+    app.mongo_client = None
+    app.db = None
     init_database(app)
     
     # Register blueprints
@@ -48,59 +85,116 @@ def create_app():
     setup_api_routes(app)
     
     # Create upload directories
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    _ensure_dir(app.config['UPLOAD_FOLDER'])
     
     return app
 
-def setup_logging():
+def setup_logging(app):
+    global _log_listener
+    
+    # Reuse the running listener when the factory is invoked again
+    if _log_listener is not None:
+        app.extensions['log_listener'] = _log_listener
+        return
+    
     log_level = os.getenv('LOG_LEVEL', 'INFO')
     log_file = os.getenv('LOG_FILE', 'logs/app.log')
     
     # Create logs directory if it doesn't exist
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    _ensure_dir(os.path.dirname(log_file))
+    
+    # Real sinks are owned by a single listener thread so request
+    # workers only enqueue records instead of blocking on disk I/O
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    
+    # Batch file writes; ERROR and above force an immediate flush
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=int(os.getenv('LOG_BUFFER', 512)),
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+    
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, memory_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    # atexit runs in reverse order: drain the queue first, then flush the buffer
+    atexit.register(memory_handler.close)
+    atexit.register(listener.stop)
+    
+    # Sinks apply the full format; the queue side only renders the message
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     
     logging.basicConfig(
         level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
+        handlers=[queue_handler]
     )
+    
+    _log_listener = listener
+    app.extensions['log_listener'] = listener
 
 def init_database(app):
     mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     db_name = os.getenv('MONGODB_DB_NAME', 'clinical_docs')
     
     try:
-        client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+        client = MongoClient(
+            mongodb_uri,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=int(os.getenv('MONGO_POOL_MAX', 50)),
+            minPoolSize=int(os.getenv('MONGO_POOL_MIN', 5)),
+            retryReads=True,
+            retryWrites=True,
+            # zlib is built in; zstd/snappy need the zstandard/python-snappy packages
+            compressors=os.getenv('MONGO_COMPRESSORS', 'zlib'),
+            appname='GenHealthAI'
+        )
         # Test the connection
         client.admin.command('ismaster')
         
         app.mongo_client = client
         app.db = client[db_name]
         
-        logging.info(f"Successfully connected to MongoDB: {db_name}")
+        logger.info('Successfully connected to MongoDB: %s', db_name)
         
     except Exception as e:
-        logging.warning(f"MongoDB connection failed: {str(e)}. Running without database.")
+        logger.warning('MongoDB connection failed: %s. Running without database.', e)
         # Create a mock database for demonstration
         app.mongo_client = None
         app.db = None
 
 def setup_middleware(app):
+    @app.before_request
+    def handle_preflight():
+        # Answer CORS preflights before view dispatch; flask_cors still
+        # attaches the Access-Control-* headers in its after_request hook.
+        # Unknown URLs fall through to the usual 404.
+        if (request.method == 'OPTIONS' and request.routing_exception is None and
+                'Access-Control-Request-Method' in request.headers):
+            return '', 204
+    
     @app.before_request
     def log_request_info():
-        if request.endpoint not in ['health.health_check', 'static']:
-            app.logger.info('Request: %s %s from %s', 
-                          request.method, request.url, request.remote_addr)
+        if not app.logger.isEnabledFor(logging.INFO):
+            return
+        if request.method == 'OPTIONS' or request.endpoint in _SKIP_ENDPOINTS:
+            return
+        environ = request.environ
+        app.logger.info('Request: %s %s from %s', 
+                      environ.get('REQUEST_METHOD'), environ.get('PATH_INFO'), 
+                      request.remote_addr)
     
     @app.after_request
     def add_security_headers(response):
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY' 
-        response.headers['X-XSS-Protection'] = '1; mode=block'
-        response.headers['Server'] = 'GenHealth.AI API'
+        response.headers.extend(_SECURITY_HEADERS)
+        # CORS headers depend on the request origin; keep shared caches honest
+        response.vary.add('Origin')
         return response
 
 def setup_error_handlers(app):
@@ -111,7 +205,7 @@ def setup_error_handlers(app):
             'error': 'Not Found',
             'message': 'The requested resource was not found',
             'status': 404,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.utcnow(),
             'service': 'GenHealth.AI Clinical Document API'
         }), 404
     
@@ -122,7 +216,7 @@ def setup_error_handlers(app):
             'error': 'Internal Server Error',
             'message': 'An internal error occurred. Please try again later.',
             'status': 500,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }), 500
     
     @app.errorhandler(413)
@@ -131,32 +225,36 @@ def setup_error_handlers(app):
             'error': 'File Too Large',
             'message': 'File size exceeds maximum allowed limit (16MB)',
             'status': 413,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }), 413
 
 def setup_api_routes(app):
+    # The API description never changes at runtime, so serialize it once
+    api_info_json = orjson.dumps({
+        'service': 'GenHealth.AI Clinical Document Processing API',
+        'version': '1.0.0',
+        'status': 'operational',
+        'environment': os.getenv('FLASK_ENV', 'production'),
+        'capabilities': {
+            'document_processing': True,
+            'ocr_extraction': True,
+            'patient_data_extraction': True,
+            'order_management': True,
+            'activity_logging': True
+        },
+        'supported_formats': ['PDF', 'PNG', 'JPG', 'TIFF'],
+        'max_file_size': '16MB'
+    })
+    
     @app.route('/')
     def api_root():
         return render_template('index.html')
     
     @app.route('/api')
     def api_info():
-        return jsonify({
-            'service': 'GenHealth.AI Clinical Document Processing API',
-            'version': '1.0.0',
-            'status': 'operational',
-            'environment': os.getenv('FLASK_ENV', 'production'),
-            'capabilities': {
-                'document_processing': True,
-                'ocr_extraction': True,
-                'patient_data_extraction': True,
-                'order_management': True,
-                'activity_logging': True
-            },
-            'supported_formats': ['PDF', 'PNG', 'JPG', 'TIFF'],
-            'max_file_size': '16MB',
-            'timestamp': datetime.utcnow().isoformat()
-        })
+        response = Response(api_info_json, mimetype='application/json')
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
 
 def register_blueprints(app):
     from app.routes.orders import orders_bp
@@ -171,13 +269,14 @@ def register_blueprints(app):
     
     # Initialize database service after MongoDB connection attempt
     from app.services.database import db_service
-    if hasattr(app, 'db') and app.db is not None:
+    if app.db is not None:
         db_service.init_db(app.db)
+        # Release pooled connections cleanly when the worker exits
+        atexit.register(db_service.close)
     else:
         # Use in-memory database for testing
-        from app.services.memory_db import memory_db
+        from app.services.memory_db import memory_db, PUBLIC_API
         # Replace db_service methods with memory_db methods
-        for attr in dir(memory_db):
-            if not attr.startswith('_') and callable(getattr(memory_db, attr)):
-                setattr(db_service, attr, getattr(memory_db, attr))
-        logging.info("Using in-memory database for testing")
\ No newline at end of file
+        for attr in PUBLIC_API:
+            setattr(db_service, attr, getattr(memory_db, attr))
+        logger.info('Using in-memory database for testing')
\ No newline at end of file
@@ -1,20 +1,29 @@
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import uuid
+
+from app.utils.helpers import coerce_datetime, request_utcnow
 import os
 
 class Document:
     
+    __slots__ = ('_id', 'filename', 'file_path', 'file_type', 'order_id', 'status', 'file_size',
+                 'extracted_text', 'patient_data', 'confidence_scores', 'processing_time',
+                 'error_message', 'created_at', 'updated_at', 'processed_at')
+    
+    # Public field names, as returned by to_dict()
+    FIELDS = frozenset(('id',) + __slots__[1:])
+    
     STATUS_UPLOADED = 'uploaded'
     STATUS_PROCESSING = 'processing'
     STATUS_COMPLETED = 'completed'
     STATUS_FAILED = 'failed'
     
-    VALID_STATUSES = [STATUS_UPLOADED, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_FAILED]
+    VALID_STATUSES = frozenset({STATUS_UPLOADED, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_FAILED})
     
     def __init__(self, filename: Optional[str] = None, file_path: Optional[str] = None, 
                  file_type: Optional[str] = None, order_id: Optional[str] = None):
-        self.id = str(uuid.uuid4())
+        self._id = None
         self.filename = filename
         self.file_path = file_path
         self.file_type = file_type
@@ -34,8 +43,22 @@ class Document:
         self.updated_at = datetime.utcnow()
         self.processed_at = None
     
+    @property
+    def id(self) -> str:
+        """Record ID, generated on first access."""
+        if self._id is None:
+            self._id = uuid.uuid4().hex
+        return self._id
+    
+    @id.setter
+    def id(self, value: str):
+        self._id = value
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert document object to dictionary."""
+        created_at = self.created_at
+        updated_at = self.updated_at
+        processed_at = self.processed_at
         return {
             'id': self.id,
             'filename': self.filename,
@@ -49,16 +72,17 @@ class Document:
             'confidence_scores': self.confidence_scores,
             'processing_time': self.processing_time,
             'error_message': self.error_message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+            'created_at': created_at.isoformat() if created_at is not None else None,
+            'updated_at': updated_at.isoformat() if updated_at is not None else None,
+            'processed_at': processed_at.isoformat() if processed_at is not None else None
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Document':
         """Create document object from dictionary."""
-        doc = cls()
-        doc.id = data.get('id', str(uuid.uuid4()))
+        # Every slot is assigned below, so skip __init__ and its default timestamps
+        doc = cls.__new__(cls)
+        doc._id = data.get('id')
         doc.filename = data.get('filename')
         doc.file_path = data.get('file_path')
         doc.file_type = data.get('file_type')
@@ -72,28 +96,21 @@ class Document:
         doc.error_message = data.get('error_message')
         
         # Handle datetime fields
-        for field in ['created_at', 'updated_at', 'processed_at']:
-            date_value = data.get(field)
-            if isinstance(date_value, str):
-                setattr(doc, field, datetime.fromisoformat(date_value.replace('Z', '+00:00')))
-            elif isinstance(date_value, datetime):
-                setattr(doc, field, date_value)
-            elif field in ['created_at', 'updated_at']:
-                setattr(doc, field, datetime.utcnow())
-            else:
-                setattr(doc, field, None)
-                
+        doc.created_at = coerce_datetime(data.get('created_at'))
+        doc.updated_at = coerce_datetime(data.get('updated_at'))
+        doc.processed_at = coerce_datetime(data.get('processed_at'), default_now=False)
+        
         return doc
     
     def update_status(self, new_status: str, error_message: Optional[str] = None):
         if new_status not in self.VALID_STATUSES:
-            raise ValueError(f"Invalid status: {new_status}. Must be one of {self.VALID_STATUSES}")
+            raise ValueError(f"Invalid status: {new_status}. Must be one of {sorted(self.VALID_STATUSES)}")
         
         self.status = new_status
-        self.updated_at = datetime.utcnow()
+        self.updated_at = request_utcnow()
         
         if new_status in [self.STATUS_COMPLETED, self.STATUS_FAILED]:
-            self.processed_at = datetime.utcnow()
+            self.processed_at = request_utcnow()
         
         if error_message:
             self.error_message = error_message
@@ -104,13 +121,17 @@ class Document:
         self.extracted_text = text
         self.patient_data = patient_data
         self.confidence_scores = confidence_scores or {}
-        self.updated_at = datetime.utcnow()
+        self.updated_at = request_utcnow()
     
-    def get_file_size(self):
-        if self.file_path and os.path.exists(self.file_path):
-            self.file_size = os.path.getsize(self.file_path)
+    def get_file_size(self, force: bool = False):
+        if self.file_size > 0 and not force:
+            return self.file_size
+        
+        try:
+            self.file_size = os.stat(self.file_path).st_size
             return self.file_size
-        return 0
+        except (OSError, TypeError):
+            return 0
     
     def is_processed(self) -> bool:
         """Check if document has been processed."""
@@ -2,18 +2,26 @@ from datetime import datetime
 from typing import Dict, Any, Optional, List
 import uuid
 
+from app.utils.helpers import coerce_datetime, request_utcnow
+
 class Order:
     
+    __slots__ = ('_id', 'patient_id', 'order_type', 'description', 'status', 'documents',
+                 'created_at', 'updated_at', 'completed_at')
+    
+    # Public field names, as returned by to_dict()
+    FIELDS = frozenset(('id',) + __slots__[1:])
+    
     STATUS_PENDING = 'pending'
     STATUS_PROCESSING = 'processing'
     STATUS_COMPLETED = 'completed'
     STATUS_CANCELLED = 'cancelled'
     
-    VALID_STATUSES = [STATUS_PENDING, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_CANCELLED]
+    VALID_STATUSES = frozenset({STATUS_PENDING, STATUS_PROCESSING, STATUS_COMPLETED, STATUS_CANCELLED})
     
     def __init__(self, patient_id: Optional[str] = None, order_type: Optional[str] = None, 
                  description: Optional[str] = None, documents: Optional[List[str]] = None):
-        self.id = str(uuid.uuid4())
+        self._id = None
         self.patient_id = patient_id
         self.order_type = order_type or 'general'
         self.description = description
@@ -23,8 +31,22 @@ class Order:
         self.updated_at = datetime.utcnow()
         self.completed_at = None
     
+    @property
+    def id(self) -> str:
+        """Record ID, generated on first access."""
+        if self._id is None:
+            self._id = uuid.uuid4().hex
+        return self._id
+    
+    @id.setter
+    def id(self, value: str):
+        self._id = value
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert order object to dictionary."""
+        created_at = self.created_at
+        updated_at = self.updated_at
+        completed_at = self.completed_at
         return {
             'id': self.id,
             'patient_id': self.patient_id,
@@ -32,16 +54,17 @@ class Order:
             'description': self.description,
             'status': self.status,
             'documents': self.documents,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'created_at': created_at.isoformat() if created_at is not None else None,
+            'updated_at': updated_at.isoformat() if updated_at is not None else None,
+            'completed_at': completed_at.isoformat() if completed_at is not None else None
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Order':
         """Create order object from dictionary."""
-        order = cls()
-        order.id = data.get('id', str(uuid.uuid4()))
+        # Every slot is assigned below, so skip __init__ and its default timestamps
+        order = cls.__new__(cls)
+        order._id = data.get('id')
         order.patient_id = data.get('patient_id')
         order.order_type = data.get('order_type', 'general')
         order.description = data.get('description')
@@ -49,38 +72,31 @@ class Order:
         order.documents = data.get('documents', [])
         
         # Handle datetime fields
-        for field in ['created_at', 'updated_at', 'completed_at']:
-            date_value = data.get(field)
-            if isinstance(date_value, str):
-                setattr(order, field, datetime.fromisoformat(date_value.replace('Z', '+00:00')))
-            elif isinstance(date_value, datetime):
-                setattr(order, field, date_value)
-            elif field in ['created_at', 'updated_at']:
-                setattr(order, field, datetime.utcnow())
-            else:
-                setattr(order, field, None)
-                
+        order.created_at = coerce_datetime(data.get('created_at'))
+        order.updated_at = coerce_datetime(data.get('updated_at'))
+        order.completed_at = coerce_datetime(data.get('completed_at'), default_now=False)
+        
         return order
     
     def update_status(self, new_status: str):
         if new_status not in self.VALID_STATUSES:
-            raise ValueError(f"Invalid status: {new_status}. Must be one of {self.VALID_STATUSES}")
+            raise ValueError(f"Invalid status: {new_status}. Must be one of {sorted(self.VALID_STATUSES)}")
         
         self.status = new_status
-        self.updated_at = datetime.utcnow()
+        self.updated_at = request_utcnow()
         
         if new_status == self.STATUS_COMPLETED:
-            self.completed_at = datetime.utcnow()
+            self.completed_at = request_utcnow()
     
     def add_document(self, document_id: str):
         if document_id not in self.documents:
             self.documents.append(document_id)
-            self.updated_at = datetime.utcnow()
+            self.updated_at = request_utcnow()
     
     def remove_document(self, document_id: str):
         if document_id in self.documents:
             self.documents.remove(document_id)
-            self.updated_at = datetime.utcnow()
+            self.updated_at = request_utcnow()
     
     def update(self, **kwargs):
         for key, value in kwargs.items():
@@ -91,4 +107,4 @@ class Order:
                     setattr(self, key, value)
         
         if 'status' not in kwargs:  # Only update timestamp if status wasn't changed
-            self.updated_at = datetime.utcnow()
\ No newline at end of file
+            self.updated_at = request_utcnow()
\ No newline at end of file
@@ -2,11 +2,19 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 import uuid
 
+from app.utils.helpers import coerce_datetime, request_utcnow
+
 class Patient:
     
+    __slots__ = ('_id', 'first_name', 'last_name', 'date_of_birth', 'extracted_from',
+                 'created_at', 'updated_at')
+    
+    # Public field names, as returned by to_dict()
+    FIELDS = frozenset(('id',) + __slots__[1:])
+    
     def __init__(self, first_name: Optional[str] = None, last_name: Optional[str] = None, 
                  date_of_birth: Optional[str] = None, extracted_from: Optional[str] = None):
-        self.id = str(uuid.uuid4())
+        self._id = None
         self.first_name = first_name
         self.last_name = last_name
         self.date_of_birth = date_of_birth
@@ -14,52 +22,53 @@ class Patient:
         self.created_at = datetime.utcnow()
         self.updated_at = datetime.utcnow()
     
+    @property
+    def id(self) -> str:
+        """Record ID, generated on first access."""
+        if self._id is None:
+            self._id = uuid.uuid4().hex
+        return self._id
+    
+    @id.setter
+    def id(self, value: str):
+        self._id = value
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert patient object to dictionary."""
+        created_at = self.created_at
+        updated_at = self.updated_at
         return {
             'id': self.id,
             'first_name': self.first_name,
             'last_name': self.last_name,
             'date_of_birth': self.date_of_birth,
             'extracted_from': self.extracted_from,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': created_at.isoformat() if created_at is not None else None,
+            'updated_at': updated_at.isoformat() if updated_at is not None else None
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Patient':
         """Create patient object from dictionary."""
-        patient = cls()
-        patient.id = data.get('id', str(uuid.uuid4()))
+        # Every slot is assigned below, so skip __init__ and its default timestamps
+        patient = cls.__new__(cls)
+        patient._id = data.get('id')
         patient.first_name = data.get('first_name')
         patient.last_name = data.get('last_name')
         patient.date_of_birth = data.get('date_of_birth')
         patient.extracted_from = data.get('extracted_from')
         
         # Handle datetime fields
-        created_at = data.get('created_at')
-        if isinstance(created_at, str):
-            patient.created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-        elif isinstance(created_at, datetime):
-            patient.created_at = created_at
-        else:
-            patient.created_at = datetime.utcnow()
-            
-        updated_at = data.get('updated_at')
-        if isinstance(updated_at, str):
-            patient.updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-        elif isinstance(updated_at, datetime):
-            patient.updated_at = updated_at
-        else:
-            patient.updated_at = datetime.utcnow()
-            
+        patient.created_at = coerce_datetime(data.get('created_at'))
+        patient.updated_at = coerce_datetime(data.get('updated_at'))
+        
         return patient
     
     def update(self, **kwargs):
         for key, value in kwargs.items():
             if hasattr(self, key) and value is not None:
                 setattr(self, key, value)
-        self.updated_at = datetime.utcnow()
+        self.updated_at = request_utcnow()
     
     def get_full_name(self) -> str:
         """Get patient's full name."""
@@ -1,29 +1,126 @@
+import io
 import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import shutil
 import logging
-from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify, current_app, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_content_range_header
 from werkzeug.utils import secure_filename
 from marshmallow import Schema, fields, ValidationError
 
 from app.models.document import Document
-from app.models.patient import Patient
 from app.services.database import db_service
-from app.services.document_processor import DocumentProcessor
+from app.tasks import enqueue_document_processing, get_document_processor
+
+# File locks serialize resumable upload chunks across workers; without
+# them (non-POSIX) only threads of one process are serialized
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint for documents API
 documents_bp = Blueprint('documents', __name__)
 
-# Initialize document processor
-doc_processor = DocumentProcessor(
-    tesseract_path=os.getenv('TESSERACT_PATH'),
-    poppler_path=os.getenv('POPPLER_PATH')
+# Read size for streamed uploads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Threads shared by batch uploads for saving files and inserting records
+_batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('BATCH_WORKERS', 8)),
+    thread_name_prefix='batch'
 )
 
+# Upload extensions accepted by allowed_file()
+_ALLOWED_EXTS = frozenset({'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.tif', '.docx'})
+
+# Resumable upload ids are uuid4 hex strings
+_UPLOAD_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+# Resumable uploads with no chunk for UPLOAD_PART_TTL seconds are deleted; 0 keeps them
+UPLOAD_PART_TTL = int(os.getenv('UPLOAD_PART_TTL', 24 * 3600))
+_UPLOAD_SWEEP_INTERVAL = 60
+_last_upload_sweep = 0.0
+_upload_thread_lock = threading.Lock()
+
 def allowed_file(filename):
-    allowed_extensions = {'pdf', 'png', 'jpg', 'jpeg', 'tiff', 'tif', 'docx'}
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return os.path.splitext(filename)[1].lower() in _ALLOWED_EXTS
+
+def _save_upload(file, file_path):
+    """Save an uploaded file, copying in-kernel when it is spooled to disk."""
+    src = file.stream
+    # werkzeug spools parts to a SpooledTemporaryFile; asking one still held
+    # in a BytesIO for fileno() would force the data out to disk first
+    if not hasattr(os, 'sendfile') or isinstance(getattr(src, '_file', None), io.BytesIO):
+        file.save(file_path)
+        return
+    try:
+        src_fd = src.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        file.save(file_path)
+        return
+    
+    src.flush()
+    size = os.fstat(src_fd).st_size
+    with open(file_path, 'wb') as dst:
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            # sendfile between these file types is unsupported; copy the rest in userspace
+            src.seek(offset)
+            dst.seek(offset)
+            shutil.copyfileobj(src, dst)
+
+def _queue_saved_upload(filename, unique_filename, file_path, order_id):
+    """Record an uploaded file and queue it for background processing."""
+    # Create document record
+    document = Document(
+        filename=unique_filename,
+        file_path=file_path,
+        file_type=os.path.splitext(filename)[1].lower(),
+        order_id=order_id
+    )
+    
+    # Get file size
+    document.get_file_size()
+    
+    # Save document to database
+    if not db_service.create_document(document):
+        # Clean up file if database save fails
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return jsonify({
+            'success': False,
+            'error': 'Failed to save document record'
+        }), 500
+    
+    # Process the document on the background worker pool; clients
+    # poll GET /api/documents/<id> for the result
+    enqueue_document_processing(document.id, file_path)
+    
+    response = jsonify({
+        'success': True,
+        'document_id': document.id,
+        'status': 'queued',
+        'message': 'Document uploaded successfully, processing has been queued'
+    })
+    response.headers['Location'] = url_for('documents.get_document', document_id=document.id)
+    return response, 202
 
 @documents_bp.route('/upload', methods=['POST'])
 def upload_document():
@@ -54,122 +151,294 @@ def upload_document():
         
         # Generate secure filename
         filename = secure_filename(file.filename or '')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
+        unique_filename = f"{uuid.uuid4().hex}_{filename}"
         
         # Save file to upload directory
         upload_folder = current_app.config['UPLOAD_FOLDER']
         file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
+        _save_upload(file, file_path)
         
-        # Create document record
-        document = Document(
-            filename=unique_filename,
-            file_path=file_path,
-            file_type=os.path.splitext(filename)[1].lower(),
-            order_id=order_id
-        )
+        return _queue_saved_upload(filename, unique_filename, file_path, order_id)
+            
+    except Exception as e:
+        logger.error(f"Error uploading document: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to upload document',
+            'message': str(e)
+        }), 500
+
+@documents_bp.route('/upload-stream', methods=['POST'])
+def upload_document_stream():
+    """
+    Upload a document sent as the raw request body.
+    
+    The body is streamed to disk in chunks without multipart parsing, e.g.
+    curl --data-binary @file.pdf -H 'Content-Type: application/octet-stream' \\
+         -H 'X-Filename: file.pdf' /api/documents/upload-stream
+    """
+    try:
+        # Filename comes from the query string or X-Filename header
+        original_filename = request.args.get('filename') or request.headers.get('X-Filename', '')
+        if not original_filename:
+            return jsonify({
+                'success': False,
+                'error': 'Filename required via ?filename= or X-Filename header'
+            }), 400
         
-        # Get file size
-        document.get_file_size()
+        # Validate file type
+        if not allowed_file(original_filename):
+            return jsonify({
+                'success': False,
+                'error': 'File type not supported. Allowed: PDF, PNG, JPG, TIFF, DOCX'
+            }), 400
+        
+        # Get optional order_id from the query string
+        order_id = request.args.get('order_id')
         
-        # Save document to database
-        if not db_service.create_document(document):
-            # Clean up file if database save fails
+        # Generate secure filename
+        filename = secure_filename(original_filename)
+        unique_filename = f"{uuid.uuid4().hex}_{filename}"
+        
+        # Stream the body straight to the upload directory
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        file_path = os.path.join(upload_folder, unique_filename)
+        try:
+            with open(file_path, 'wb') as f:
+                while chunk := request.stream.read(STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+        except Exception:
+            # Don't leave partial uploads behind
             if os.path.exists(file_path):
                 os.remove(file_path)
+            raise
+        
+        if os.path.getsize(file_path) == 0:
+            os.remove(file_path)
             return jsonify({
                 'success': False,
-                'error': 'Failed to save document record'
-            }), 500
-        
-        # Process document asynchronously in background
-        # For this assessment, we'll process synchronously
-        document.update_status(Document.STATUS_PROCESSING)
-        db_service.update_document(document.id, {'status': document.status})
-        
-        # Process the document using OCR
-        processing_result = doc_processor.process_document(file_path)
-        
-        if processing_result['success']:
-            # Update document with extracted data
-            document.set_extracted_data(
-                processing_result['extracted_text'],
-                processing_result['patient_data'],
-                processing_result['confidence_scores']
-            )
-            document.processing_time = processing_result['processing_time']
-            document.update_status(Document.STATUS_COMPLETED)
-            
-            # Try to create or find patient record
-            patient_created = False
-            patient_id = None
-            
-            patient_data = processing_result['patient_data']
-            if patient_data.get('first_name') and patient_data.get('last_name'):
-                # Check if patient already exists
-                existing_patient = db_service.find_patient_by_name(
-                    patient_data['first_name'], 
-                    patient_data['last_name']
-                )
-                
-                if existing_patient:
-                    patient_id = existing_patient.id
-                    logger.info(f"Found existing patient: {patient_id}")
-                else:
-                    # Create new patient record
-                    new_patient = Patient(
-                        first_name=patient_data['first_name'],
-                        last_name=patient_data['last_name'],
-                        date_of_birth=patient_data['date_of_birth'],
-                        extracted_from=unique_filename
-                    )
-                    
-                    if db_service.create_patient(new_patient):
-                        patient_id = new_patient.id
-                        patient_created = True
-                        logger.info(f"Created new patient: {patient_id}")
-            
-            # Update document in database
-            update_data = {
-                'status': document.status,
-                'extracted_text': document.extracted_text,
-                'patient_data': document.patient_data,
-                'confidence_scores': document.confidence_scores,
-                'processing_time': document.processing_time,
-                'processed_at': document.processed_at
-            }
+                'error': 'No file uploaded'
+            }), 400
+        
+        return _queue_saved_upload(filename, unique_filename, file_path, order_id)
+        
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming document upload: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to upload document',
+            'message': str(e)
+        }), 500
+
+def _upload_paths(upload_id):
+    """Get the partial-data and metadata paths for a resumable upload."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    base = os.path.join(upload_folder, f"{upload_id}.part")
+    return base, f"{base}.json"
+
+@contextmanager
+def _upload_lock(meta_file):
+    """Hold the exclusive lock for a resumable upload; released when meta_file closes."""
+    if fcntl is None:
+        with _upload_thread_lock:
+            yield
+    else:
+        fcntl.flock(meta_file, fcntl.LOCK_EX)
+        yield
+
+def _sweep_expired_uploads(upload_folder):
+    """Delete resumable uploads that have not received a chunk for UPLOAD_PART_TTL seconds."""
+    global _last_upload_sweep
+    now = time.time()
+    if not UPLOAD_PART_TTL or now - _last_upload_sweep < _UPLOAD_SWEEP_INTERVAL:
+        return
+    _last_upload_sweep = now
+    
+    # Every chunk rewrites the metadata file, so its mtime is the last activity
+    cutoff = now - UPLOAD_PART_TTL
+    for entry in os.scandir(upload_folder):
+        if not entry.name.endswith('.part.json'):
+            continue
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            with open(entry.path, 'r+') as meta_file, _upload_lock(meta_file):
+                # A chunk may have arrived, or the upload completed, while waiting for the lock
+                if not os.path.exists(entry.path) or os.path.getmtime(entry.path) >= cutoff:
+                    continue
+                part_path = entry.path[:-len('.json')]
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                os.remove(entry.path)
+            logger.info(f"Expired abandoned upload {entry.name[:-len('.part.json')]}")
+        except FileNotFoundError:
+            continue
+
+def _merge_ranges(ranges):
+    """Merge [start, stop) byte ranges into a sorted, non-overlapping list."""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+@documents_bp.route('/upload/init', methods=['POST'])
+def init_resumable_upload():
+    """Start a resumable upload and return its upload id."""
+    try:
+        data = request.get_json(silent=True) or request.form
+        original_filename = data.get('filename') or ''
+        if not original_filename:
+            return jsonify({
+                'success': False,
+                'error': 'Filename is required'
+            }), 400
+        
+        # Validate file type
+        if not allowed_file(original_filename):
+            return jsonify({
+                'success': False,
+                'error': 'File type not supported. Allowed: PDF, PNG, JPG, TIFF, DOCX'
+            }), 400
+        
+        _sweep_expired_uploads(current_app.config['UPLOAD_FOLDER'])
+        
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = _upload_paths(upload_id)
+        
+        # Zero-length data file plus the received-range bookkeeping
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w') as f:
+            json.dump({
+                'filename': secure_filename(original_filename),
+                'order_id': data.get('order_id'),
+                'total': None,
+                'ranges': []
+            }, f)
+        
+        return jsonify({
+            'success': True,
+            'upload_id': upload_id,
+            'upload_url': f"/api/documents/upload/{upload_id}"
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error starting resumable upload: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to start upload',
+            'message': str(e)
+        }), 500
+
+@documents_bp.route('/upload/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    """
+    Write one byte range of a resumable upload.
+    
+    Each request carries a ``Content-Range: bytes start-end/total`` header.
+    Chunks may arrive in any order or be retried; processing is queued
+    once every byte of the file has been received.
+    """
+    try:
+        if not _UPLOAD_ID_RE.fullmatch(upload_id):
+            return jsonify({
+                'success': False,
+                'error': 'Upload not found'
+            }), 404
+        
+        part_path, meta_path = _upload_paths(upload_id)
+        
+        content_range = parse_content_range_header(request.headers.get('Content-Range'))
+        # 'bytes */total' parses without a start and carries no data
+        if (content_range is None or content_range.units != 'bytes' or content_range.start is None or
+                content_range.length is None or content_range.stop > content_range.length):
+            if content_range is not None and content_range.length == 0:
+                # No byte range can describe an empty file, so it could never complete
+                return jsonify({
+                    'success': False,
+                    'error': 'No file uploaded'
+                }), 400
+            return jsonify({
+                'success': False,
+                'error': 'Content-Range header must be of the form bytes start-end/total'
+            }), 400
+        
+        start, stop, total = content_range.start, content_range.stop, content_range.length
+        max_size = current_app.config['MAX_CONTENT_LENGTH']
+        if max_size and total > max_size:
+            raise RequestEntityTooLarge()
+        
+        chunk = request.stream.read()
+        if len(chunk) != stop - start:
+            return jsonify({
+                'success': False,
+                'error': 'Request body length does not match Content-Range'
+            }), 400
+        
+        try:
+            meta_file = open(meta_path, 'r+')
+        except FileNotFoundError:
+            # Never started, already completed or expired
+            return jsonify({
+                'success': False,
+                'error': 'Upload not found'
+            }), 404
+        
+        # Serialize chunk writes for this upload across threads and workers
+        with meta_file, _upload_lock(meta_file):
+            if not os.path.exists(meta_path):
+                return jsonify({
+                    'success': False,
+                    'error': 'Upload already completed or expired'
+                }), 409
+            meta = json.load(meta_file)
             
-            db_service.update_document(document.id, update_data)
+            if meta['total'] is not None and meta['total'] != total:
+                return jsonify({
+                    'success': False,
+                    'error': 'Total size does not match earlier chunks'
+                }), 400
             
-            return jsonify({
-                'success': True,
-                'document': document.to_dict(),
-                'patient_created': patient_created,
-                'patient_id': patient_id,
-                'message': 'Document processed successfully'
-            }), 200
+            with open(part_path, 'r+b') as part_file:
+                part_file.seek(start)
+                part_file.write(chunk)
             
-        else:
-            # Processing failed
-            document.update_status(Document.STATUS_FAILED, processing_result['error_message'])
-            db_service.update_document(document.id, {
-                'status': document.status,
-                'error_message': document.error_message
-            })
+            meta['total'] = total
+            meta['ranges'] = _merge_ranges(meta['ranges'] + [[start, stop]])
             
-            return jsonify({
-                'success': False,
-                'document': document.to_dict(),
-                'error': 'Document processing failed',
-                'message': processing_result['error_message']
-            }), 422
+            if meta['ranges'] != [[0, total]]:
+                meta_file.seek(0)
+                meta_file.truncate()
+                json.dump(meta, meta_file)
+                received = sum(stop - start for start, stop in meta['ranges'])
+                return jsonify({
+                    'success': True,
+                    'upload_id': upload_id,
+                    'received': received,
+                    'total': total,
+                    'complete': False
+                }), 200
             
+            # Final byte arrived: move the file into place and release the upload id
+            filename = meta['filename']
+            unique_filename = f"{upload_id}_{filename}"
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
+            os.replace(part_path, file_path)
+            os.remove(meta_path)
+        
+        return _queue_saved_upload(filename, unique_filename, file_path, meta['order_id'])
+        
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}")
+        logger.error(f"Error writing chunk for upload {upload_id}: {str(e)}")
         return jsonify({
             'success': False,
-            'error': 'Failed to upload document',
+            'error': 'Failed to upload chunk',
             'message': str(e)
         }), 500
 
@@ -185,10 +454,26 @@ def get_document(document_id):
                 'error': 'Document not found'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'data': document.to_dict()
-        }), 200
+        # Every write bumps updated_at, so it versions the record for pollers
+        etag = hashlib.md5(
+            f"{document.id}:{document.status}:{document.updated_at}".encode(),
+            usedforsecurity=False
+        ).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify({
+                'success': True,
+                'data': document.to_dict()
+            })
+        response.set_etag(etag)
+        
+        # Completed and failed documents no longer change; let clients keep them
+        if document.is_processed():
+            response.headers['Cache-Control'] = 'private, max-age=3600'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
         logger.error(f"Error retrieving document {document_id}: {str(e)}")
@@ -198,6 +483,49 @@ def get_document(document_id):
             'message': str(e)
         }), 500
 
+def _save_batch_file(file, order_id, upload_folder):
+    """Save one batch file and build its document record.
+    
+    Returns the file's result entry and the unsaved document, or None
+    in place of the document when the file could not be stored.
+    """
+    if not allowed_file(file.filename):
+        return {
+            'filename': file.filename,
+            'status': 'failed',
+            'error': 'File type not supported'
+        }, None
+    
+    try:
+        filename = secure_filename(file.filename or '')
+        unique_filename = f"{uuid.uuid4().hex}_{filename}"
+        
+        file_path = os.path.join(upload_folder, unique_filename)
+        _save_upload(file, file_path)
+        
+        # Create document record
+        document = Document(
+            filename=unique_filename,
+            file_path=file_path,
+            file_type=os.path.splitext(filename)[1].lower(),
+            order_id=order_id
+        )
+        document.get_file_size()
+        
+        return {
+            'filename': filename,
+            'document_id': document.id,
+            'status': 'uploaded',
+            'message': 'File uploaded successfully, processing will begin shortly'
+        }, document
+    
+    except Exception as e:
+        return {
+            'filename': file.filename,
+            'status': 'failed',
+            'error': str(e)
+        }, None
+
 @documents_bp.route('/batch', methods=['POST'])
 def batch_upload():
     try:
@@ -208,8 +536,9 @@ def batch_upload():
                 'error': 'No files uploaded'
             }), 400
         
-        files = request.files.getlist('files')
-        if not files or all(f.filename == '' for f in files):
+        # FileStorage is falsy when the part has no filename
+        files = [f for f in request.files.getlist('files') if f]
+        if not files:
             return jsonify({
                 'success': False,
                 'error': 'No files selected'
@@ -218,70 +547,34 @@ def batch_upload():
         # Get optional order_id
         order_id = request.form.get('order_id')
         
+        # Disk writes are I/O bound, so overlap them across files
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        saved = list(_batch_executor.map(
+            lambda f: _save_batch_file(f, order_id, upload_folder), files
+        ))
+        
+        # Record every stored file with a single bulk insert
+        created = set(db_service.create_documents_bulk([doc for _, doc in saved if doc is not None]))
         results = []
-        successful_count = 0
-        failed_count = 0
-        
-        for file in files:
-            if file and allowed_file(file.filename):
-                try:
-                    # Process each file similar to single upload
-                    filename = secure_filename(file.filename or '')
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    unique_filename = f"{timestamp}_{filename}"
-                    
-                    upload_folder = current_app.config['UPLOAD_FOLDER']
-                    file_path = os.path.join(upload_folder, unique_filename)
-                    file.save(file_path)
-                    
-                    # Create document record
-                    document = Document(
-                        filename=unique_filename,
-                        file_path=file_path,
-                        file_type=os.path.splitext(filename)[1].lower(),
-                        order_id=order_id
-                    )
-                    document.get_file_size()
-                    
-                    if db_service.create_document(document):
-                        results.append({
-                            'filename': filename,
-                            'document_id': document.id,
-                            'status': 'uploaded',
-                            'message': 'File uploaded successfully, processing will begin shortly'
-                        })
-                        successful_count += 1
-                    else:
-                        # Clean up file if database save fails
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                        results.append({
-                            'filename': filename,
-                            'status': 'failed',
-                            'error': 'Failed to save document record'
-                        })
-                        failed_count += 1
-                        
-                except Exception as e:
-                    results.append({
-                        'filename': file.filename,
-                        'status': 'failed',
-                        'error': str(e)
-                    })
-                    failed_count += 1
-            else:
-                results.append({
-                    'filename': file.filename,
+        for result, document in saved:
+            if document is not None and document.id not in created:
+                # Clean up file if database save fails
+                if os.path.exists(document.file_path):
+                    os.remove(document.file_path)
+                result = {
+                    'filename': result['filename'],
                     'status': 'failed',
-                    'error': 'File type not supported'
-                })
-                failed_count += 1
+                    'error': 'Failed to save document record'
+                }
+            results.append(result)
+        successful_count = sum(1 for r in results if r['status'] != 'failed')
+        failed_count = len(results) - successful_count
         
         return jsonify({
             'success': True,
             'results': results,
             'summary': {
-                'total_files': len(files),
+                'total_files': len(results),
                 'successful': successful_count,
                 'failed': failed_count
             },
@@ -318,34 +611,19 @@ def test_extraction():
                 'error': 'File type not supported'
             }), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename or '')
-        temp_path = os.path.join('/tmp', f"test_{filename}")
-        file.save(temp_path)
+        # Extract straight from the upload buffer; nothing is persisted
+        data = file.read()
+        result = get_document_processor().process_bytes(data, os.path.splitext(file.filename)[1].lower())
+        
+        return jsonify({
+            'success': result['success'],
+            'extracted_text': result['extracted_text'],
+            'patient_data': result['patient_data'],
+            'confidence_scores': result['confidence_scores'],
+            'processing_time': result['processing_time'],
+            'error_message': result['error_message']
+        }), 200
         
-        try:
-            # Process document
-            result = doc_processor.process_document(temp_path)
-            
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            
-            return jsonify({
-                'success': result['success'],
-                'extracted_text': result['extracted_text'],
-                'patient_data': result['patient_data'],
-                'confidence_scores': result['confidence_scores'],
-                'processing_time': result['processing_time'],
-                'error_message': result['error_message']
-            }), 200
-            
-        except Exception as e:
-            # Clean up on error
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            raise e
-            
     except Exception as e:
         logger.error(f"Error in test extraction: {str(e)}")
         return jsonify({
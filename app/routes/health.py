@@ -1,27 +1,75 @@
 import os
-from flask import Blueprint, jsonify, request
+import time
+import threading
+import orjson
+from datetime import datetime
+from flask import Blueprint, Response, jsonify, request
 from app.utils.monitoring import create_detailed_health_response
 
 # Health check blueprint
 health_bp = Blueprint('health', __name__)
 
+# Seconds a detailed health report is reused across probes
+HEALTH_CACHE_TTL = 1.0
+
+# Last detailed health report; refreshed by one request at a time
+_health_cache = {'ts': 0.0, 'data': None, 'lock': threading.Lock()}
+
+def _get_detailed_health():
+    """Return the detailed health report, rebuilding it at most once per TTL."""
+    data = _health_cache['data']
+    if data is not None and time.monotonic() - _health_cache['ts'] < HEALTH_CACHE_TTL:
+        return data
+    
+    lock = _health_cache['lock']
+    # While one probe rebuilds the report, others serve the previous one
+    if not lock.acquire(blocking=data is None):
+        return data
+    try:
+        if _health_cache['data'] is None or time.monotonic() - _health_cache['ts'] >= HEALTH_CACHE_TTL:
+            _health_cache['data'] = create_detailed_health_response()
+            _health_cache['ts'] = time.monotonic()
+        return _health_cache['data']
+    finally:
+        lock.release()
+
+# (epoch second, encoded body) for the load balancer probe
+_simple_health = (0, b'')
+
+def _get_simple_health():
+    """Return the simple probe body, re-encoded only when the second changes."""
+    global _simple_health
+    second, body = _simple_health
+    now = int(time.time())
+    if now != second:
+        body = orjson.dumps({
+            'status': 'healthy',
+            'service': 'Clinical Document API',
+            'timestamp': str(datetime.utcfromtimestamp(now))
+        })
+        _simple_health = (now, body)
+    return body
+
 @health_bp.route('/health', methods=['GET'])
 def health_check():
     try:
         # Basic health check for load balancers (fast response)
         if request.args.get('simple') == 'true':
-            return jsonify({
-                'status': 'healthy',
-                'service': 'Clinical Document API',
-                'timestamp': str(__import__('datetime').datetime.utcnow())
-            }), 200
+            return Response(_get_simple_health(), mimetype='application/json'), 200
+        
+        # Full system and dependency report, shared across concurrent probes
+        if request.args.get('detailed') == 'true':
+            response = jsonify(_get_detailed_health())
+            # Clients may reuse the report for as long as the server does
+            response.headers['Cache-Control'] = f'max-age={int(HEALTH_CACHE_TTL)}'
+            return response, 200
         
         # Simple health response
         return jsonify({
             'status': 'healthy',
             'service': 'Clinical Document API',
             'timestamp': str(__import__('datetime').datetime.utcnow()),
-            'database': 'connected' if hasattr(__import__('flask').current_app, 'db') else 'in-memory'
+            'database': 'connected' if __import__('flask').current_app.db is not None else 'in-memory'
         }), 200
         
     except Exception as e:
@@ -32,24 +80,29 @@ def health_check():
             'timestamp': str(__import__('datetime').datetime.utcnow())
         }), 503
 
+# /info never changes at runtime, so it is serialized once at import
+_API_INFO_JSON = orjson.dumps({
+    'name': 'Clinical Document Processing API',
+    'version': '1.0.0',
+    'description': 'OCR-based clinical document processing with patient data extraction',
+    'endpoints': {
+        'documents': '/api/documents',
+        'orders': '/api/orders', 
+        'patients': '/api/patients',
+        'health': '/health',
+        'info': '/info'
+    },
+    'features': [
+        'OCR document processing',
+        'Patient data extraction',
+        'Order management',
+        'Activity logging',
+        'Batch processing'
+    ]
+})
+
 @health_bp.route('/info', methods=['GET'])
 def api_info():
-    return jsonify({
-        'name': 'Clinical Document Processing API',
-        'version': '1.0.0',
-        'description': 'OCR-based clinical document processing with patient data extraction',
-        'endpoints': {
-            'documents': '/api/documents',
-            'orders': '/api/orders', 
-            'patients': '/api/patients',
-            'health': '/health',
-            'info': '/info'
-        },
-        'features': [
-            'OCR document processing',
-            'Patient data extraction',
-            'Order management',
-            'Activity logging',
-            'Batch processing'
-        ]
-    }), 200
\ No newline at end of file
+    response = Response(_API_INFO_JSON, mimetype='application/json')
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response, 200
@@ -1,10 +1,13 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from marshmallow import Schema, fields, ValidationError
 from typing import Dict, Any
 import logging
 
 from app.models.order import Order
-from app.services.database import db_service
+from app.models.document import Document
+from app.services.database import db_service, run_concurrently
+from app.utils.helpers import parse_fields, select_fields
+from app.utils.json import iter_ndjson
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +37,35 @@ def get_orders():
         skip = request.args.get('skip', 0, type=int)
         limit = min(request.args.get('limit', 10, type=int), 100)  # Max 100 items
         
+        # Optional ?fields=a,b selection, pushed down to the database projection
+        try:
+            selected = parse_fields(request.args.get('fields'), Order.FIELDS)
+        except ValueError as err:
+            return jsonify({
+                'success': False,
+                'error': str(err)
+            }), 400
+        
+        # Cursor paging (?cursor=, then each next_cursor) costs the same at any depth
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            try:
+                orders_data, next_cursor = db_service.get_orders_after(
+                    cursor=cursor or None, limit=limit, fields=selected
+                )
+            except ValueError as err:
+                return jsonify({
+                    'success': False,
+                    'error': str(err)
+                }), 400
+            
+            return jsonify({
+                'success': True,
+                'data': select_fields(orders_data, selected),
+                'limit': limit,
+                'next_cursor': next_cursor
+            }), 200
+        
         # Retrieve orders from database
         orders = db_service.get_orders(skip=skip, limit=limit)
         
@@ -42,7 +74,7 @@ def get_orders():
         
         return jsonify({
             'success': True,
-            'data': orders_data,
+            'data': select_fields(orders_data, selected),
             'total': len(orders_data),
             'skip': skip,
             'limit': limit
@@ -171,14 +203,8 @@ def update_order(order_id):
             }), 400
         
         # Update order in database
-        if db_service.update_order(order_id, validated_data):
-            # Retrieve updated order
-            updated_order = db_service.get_order(order_id)
-            if not updated_order:
-                return jsonify({
-                    'success': False,
-                    'error': 'Order updated but could not retrieve updated data'
-                }), 500
+        updated_order = db_service.update_order(order_id, validated_data)
+        if updated_order:
             return jsonify({
                 'success': True,
                 'data': updated_order.to_dict(),
@@ -232,17 +258,39 @@ def delete_order(order_id):
 @orders_bp.route('/<order_id>/documents', methods=['GET'])
 def get_order_documents(order_id):
     try:
-        # Check if order exists
-        existing_order = db_service.get_order(order_id)
+        # Optional ?fields=a,b selection, e.g. to skip extracted_text
+        try:
+            selected = parse_fields(request.args.get('fields'), Document.FIELDS)
+        except ValueError as err:
+            return jsonify({
+                'success': False,
+                'error': str(err)
+            }), 400
+        
+        # NDJSON clients get each document as the database returns it
+        # instead of waiting for the whole list to be built
+        if request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson':
+            if not db_service.get_order(order_id):
+                return jsonify({
+                    'success': False,
+                    'error': 'Order not found'
+                }), 404
+            documents = db_service.iter_documents_by_order(order_id, fields=selected)
+            records = (select_fields([doc.to_dict()], selected)[0] for doc in documents)
+            return Response(stream_with_context(iter_ndjson(records)), mimetype='application/x-ndjson')
+        
+        # Look up the order and its documents at the same time
+        existing_order, documents = run_concurrently(
+            lambda: db_service.get_order(order_id),
+            lambda: db_service.get_documents_by_order(order_id, fields=selected)
+        )
         if not existing_order:
             return jsonify({
                 'success': False,
                 'error': 'Order not found'
             }), 404
         
-        # Get documents for this order
-        documents = db_service.get_documents_by_order(order_id)
-        documents_data = [doc.to_dict() for doc in documents]
+        documents_data = select_fields([doc.to_dict() for doc in documents], selected)
         
         return jsonify({
             'success': True,
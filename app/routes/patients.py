@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
-from marshmallow import Schema, fields, ValidationError
+from marshmallow import EXCLUDE, Schema, fields, ValidationError
 import logging
 from typing import Dict, Any, cast
 
 from app.models.patient import Patient
-from app.services.database import db_service
+from app.models.order import Order
+from app.services.database import db_service, run_concurrently
+from app.utils.helpers import parse_fields, select_fields
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +21,9 @@ class PatientSchema(Schema):
     extracted_from = fields.Str(required=False, allow_none=True, load_default=None)
     
     class Meta:
-        unknown = 'EXCLUDE'
+        unknown = EXCLUDE
 
+# Built once at import; marshmallow resolves field load hooks per instance
 patient_schema = PatientSchema()
 
 @patients_bp.route('', methods=['GET'])
@@ -30,18 +33,45 @@ def get_patients():
         skip = request.args.get('skip', 0, type=int)
         limit = min(request.args.get('limit', 10, type=int), 100)  # Max 100 items
         
-        # Retrieve patients from database
-        patients = db_service.get_patients(skip=skip, limit=limit)
+        # Optional ?fields=a,b selection, pushed down to the database projection
+        try:
+            selected = parse_fields(request.args.get('fields'), Patient.FIELDS)
+        except ValueError as err:
+            return jsonify({
+                'success': False,
+                'error': str(err)
+            }), 400
+        
+        # Cursor paging (?cursor=, then each next_cursor) costs the same at any depth
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            try:
+                patients_data, next_cursor = db_service.get_patients_after(
+                    cursor=cursor or None, limit=limit, fields=selected
+                )
+            except ValueError as err:
+                return jsonify({
+                    'success': False,
+                    'error': str(err)
+                }), 400
+            
+            return jsonify({
+                'success': True,
+                'data': select_fields(patients_data, selected),
+                'limit': limit,
+                'next_cursor': next_cursor
+            }), 200
         
-        # Convert to dictionaries
-        patients_data = [patient.to_dict() for patient in patients]
+        # Retrieve one page of patients along with the overall count
+        patients_data, total = db_service.get_patients_page(skip=skip, limit=limit, fields=selected)
         
         return jsonify({
             'success': True,
-            'data': patients_data,
-            'total': len(patients_data),
+            'data': select_fields(patients_data, selected),
+            'total': total,
             'skip': skip,
-            'limit': limit
+            'limit': limit,
+            'has_more': skip + len(patients_data) < total
         }), 200
         
     except Exception as e:
@@ -77,6 +107,45 @@ def get_patient(patient_id):
             'message': str(e)
         }), 500
 
+@patients_bp.route('/<patient_id>/orders', methods=['GET'])
+def get_patient_orders(patient_id):
+    try:
+        # Optional ?fields=a,b selection, pushed down to the database projection
+        try:
+            selected = parse_fields(request.args.get('fields'), Order.FIELDS)
+        except ValueError as err:
+            return jsonify({
+                'success': False,
+                'error': str(err)
+            }), 400
+        
+        # Look up the patient and their orders at the same time
+        existing_patient, orders = run_concurrently(
+            lambda: db_service.get_patient(patient_id),
+            lambda: db_service.get_orders_by_patient(patient_id, fields=selected)
+        )
+        if not existing_patient:
+            return jsonify({
+                'success': False,
+                'error': 'Patient not found'
+            }), 404
+        
+        orders_data = select_fields([order.to_dict() for order in orders], selected)
+        
+        return jsonify({
+            'success': True,
+            'data': orders_data,
+            'total': len(orders_data)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error retrieving orders for patient {patient_id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to retrieve orders',
+            'message': str(e)
+        }), 500
+
 @patients_bp.route('', methods=['POST'])
 def create_patient():
     try:
@@ -155,15 +224,8 @@ def update_patient(patient_id):
             }), 400
         
         # Update patient in database
-        # Update patient in database
-        if db_service.update_patient(patient_id, validated_data):
-            # Retrieve updated patient
-            updated_patient = db_service.get_patient(patient_id)
-            if not updated_patient:
-                return jsonify({
-                    'success': False,
-                    'error': 'Failed to retrieve updated patient'
-                }), 500
+        updated_patient = db_service.update_patient(patient_id, validated_data)
+        if updated_patient:
             return jsonify({
                 'success': True,
                 'data': updated_patient.to_dict(),
@@ -217,4 +279,34 @@ def search_patients():
             'success': False,
             'error': 'Failed to search patients',
             'message': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@patients_bp.route('/autocomplete', methods=['GET'])
+def autocomplete_patients():
+    try:
+        first_name = request.args.get('first_name')
+        last_name = request.args.get('last_name')
+        limit = min(request.args.get('limit', 10, type=int), 100)  # Max 100 items
+        
+        if not first_name:
+            return jsonify({
+                'success': False,
+                'error': 'first_name is required for autocomplete'
+            }), 400
+        
+        # first_name alone is a prefix; with last_name, last_name is the prefix
+        patients_data = db_service.search_patients_by_prefix(first_name, last_name or None, limit=limit)
+        
+        return jsonify({
+            'success': True,
+            'data': patients_data,
+            'count': len(patients_data)
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error autocompleting patients: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to search patients',
+            'message': str(e)
+        }), 500
@@ -1,6 +1,12 @@
 """Service layer initialization."""
 
 from .database import db_service, DatabaseService
-from .document_processor import DocumentProcessor
 
-__all__ = ['db_service', 'DatabaseService', 'DocumentProcessor']
\ No newline at end of file
+__all__ = ['db_service', 'DatabaseService', 'DocumentProcessor']
+
+def __getattr__(name):
+    # Import the document processor (and its parsing dependencies) on first use
+    if name == 'DocumentProcessor':
+        from .document_processor import DocumentProcessor
+        return DocumentProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
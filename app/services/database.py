@@ -1,17 +1,94 @@
+import os
 import logging
-from typing import Dict, List, Any, Optional
-from pymongo import MongoClient
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Iterator, List, Any, Optional, Tuple
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from pymongo.collation import Collation, CollationStrength
 from pymongo.collection import Collection
 from flask import current_app
 from datetime import datetime
-import uuid
 
 from app.models.patient import Patient
 from app.models.order import Order
 from app.models.document import Document
+from app.utils.helpers import coerce_datetime, decode_cursor, encode_cursor, random_uuid
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Activity log batching: flush every AUDIT_FLUSH_INTERVAL seconds or at AUDIT_BATCH_SIZE entries
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 0.5))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 100))
+# Entries kept for retry while MongoDB is unreachable; the oldest are dropped beyond this
+AUDIT_BUFFER_MAX = int(os.getenv('AUDIT_BUFFER_MAX', 10000))
+
+# Single-record reads are only audited when explicitly enabled
+AUDIT_READS = os.getenv('AUDIT_READS', 'false').lower() == 'true'
+
+# Activity logs expire this many seconds after their timestamp; 0 keeps them forever
+AUDIT_TTL_SECONDS = int(os.getenv('AUDIT_TTL_SECONDS', 90 * 24 * 3600))
+AUDIT_TTL_INDEX = 'activity_logs_ttl'
+
+# Patients and orders looked up by id are cached for ENTITY_CACHE_TTL seconds
+# while a change stream drops entries as soon as any process writes them;
+# without change streams (standalone mongod) nothing is cached
+ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', 10000))
+ENTITY_CACHE_TTL = float(os.getenv('ENTITY_CACHE_TTL', 300))
+
+# Records fetched per round trip when streaming unbounded result sets
+STREAM_BATCH_SIZE = 100
+
+# Case-insensitive comparison shared by the patient name index and lookups
+NAME_COLLATION = Collation(locale='en', strength=CollationStrength.SECONDARY)
+NAME_PREFIX_END = '\uffff'
+
+# OperationFailure code for dropping an index that no longer exists
+INDEX_NOT_FOUND = 27
+
+# Patients created from documents are unique per name and date of birth;
+# patients created through the API are outside the index and may share them
+EXTRACTED_PATIENT_FILTER = {'extracted_from': {'$type': 'string'}}
+EXTRACTED_PATIENT_INDEX = 'extracted_patient_unique'
+
+# Default-named indexes from earlier releases that newer indexes replace
+_SUPERSEDED_INDEXES = {
+    'patients': ('first_name_1_last_name_1', 'created_at_1'),
+    'orders': ('created_at_1', 'patient_id_1'),
+    'activity_logs': ('timestamp_1',),
+    'documents': ('order_id_1',),
+}
+
+# Document fields stored in the order_documents_covering index; a
+# get_documents_by_order() selection within these never reads the documents
+DOCUMENT_INDEX_FIELDS = frozenset(('id', 'filename', 'status', 'created_at'))
+
+# Threads for issuing independent queries of one request side by side
+_query_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('QUERY_WORKERS', 8)),
+    thread_name_prefix='mongo-query'
+)
+
+def run_concurrently(*calls: Callable[[], Any]) -> List[Any]:
+    """Run independent database calls at the same time and return their results in order.
+    
+    The first call runs on the current thread, so the latency is that of
+    the slowest call rather than the sum of all of them.
+    """
+    futures = [_query_executor.submit(call) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
+
+def _projection(fields: Optional[List[str]], *required: str) -> Dict[str, Any]:
+    """Build a find() projection for the selected fields, never returning _id."""
+    projection: Dict[str, Any] = {'_id': 0}
+    if fields:
+        projection.update(dict.fromkeys(fields, 1))
+        projection.update(dict.fromkeys(required, 1))
+    return projection
+
 class DatabaseService:
     
     def __init__(self):
@@ -21,6 +98,18 @@ class DatabaseService:
         self.orders_collection: Optional[Collection] = None
         self.documents_collection: Optional[Collection] = None
         self.activity_logs_collection: Optional[Collection] = None
+        
+        # Pending activity log entries, written by the audit flush thread
+        self._audit_buffer: Deque[Dict[str, Any]] = deque()
+        self._audit_lock = threading.Lock()
+        self._audit_wakeup = threading.Event()
+        self._audit_thread: Optional[threading.Thread] = None
+        
+        # Raw documents for get_patient()/get_order(), keyed by id; the TTL
+        # stays 0 (caching off) until the change stream is open
+        self._patient_cache = TTLCache(ENTITY_CACHE_SIZE, 0)
+        self._order_cache = TTLCache(ENTITY_CACHE_SIZE, 0)
+        self._change_stream: Optional[Any] = None
     
     def init_db(self, db):
         """Initialize database collections."""
@@ -33,66 +122,319 @@ class DatabaseService:
             
             # Create indexes for better performance
             self._create_indexes()
+            
+            if ENTITY_CACHE_TTL > 0:
+                threading.Thread(target=self._watch_cached_collections, name='cache-invalidator', daemon=True).start()
+    
+    def close(self):
+        """Flush pending activity logs, then close the MongoDB client and its pool."""
+        self.flush_audit()
+        stream, self._change_stream = self._change_stream, None
+        if stream is not None:
+            stream.close()
+        if self.db is not None:
+            self.db.client.close()
     
     def _create_indexes(self):
         """Create database indexes for improved query performance."""
-        if not all([self.patients_collection, self.orders_collection, 
-                   self.documents_collection, self.activity_logs_collection]):
+        # Collections do not support truth testing, so compare against None
+        if any(collection is None for collection in (self.patients_collection, self.orders_collection,
+                                                     self.documents_collection, self.activity_logs_collection)):
             logger.error("Collections not initialized. Cannot create indexes.")
             return
         
         try:
             # Patient indexes
             if self.patients_collection is not None:
-                self.patients_collection.create_index([("first_name", 1), ("last_name", 1)])
+                # Case-insensitive name index used by find_patient_by_name()
+                self.patients_collection.create_index(
+                    [("first_name", 1), ("last_name", 1)],
+                    name='patient_name_ci',
+                    collation=NAME_COLLATION
+                )
                 self.patients_collection.create_index("date_of_birth")
-                self.patients_collection.create_index("created_at")
+                self._ensure_extracted_patient_index()
+                self.patients_collection.create_index([("created_at", -1), ("id", -1)])
             
             # Order indexes
             if self.orders_collection is not None:
-                self.orders_collection.create_index("patient_id")
+                # Serves get_orders_by_patient() already in newest-first order
+                self.orders_collection.create_index([("patient_id", 1), ("created_at", -1)])
                 self.orders_collection.create_index("status")
-                self.orders_collection.create_index("created_at")
+                self.orders_collection.create_index([("created_at", -1), ("id", -1)])
             
             # Document indexes
             if self.documents_collection is not None:
-                self.documents_collection.create_index("order_id")
+                # Covers order document lists restricted to DOCUMENT_INDEX_FIELDS
+                self.documents_collection.create_index(
+                    [("order_id", 1), ("created_at", -1), ("id", 1), ("filename", 1), ("status", 1)],
+                    name='order_documents_covering'
+                )
                 self.documents_collection.create_index("status")
                 self.documents_collection.create_index("filename")
             
             # Activity log indexes
             if self.activity_logs_collection is not None:
-                self.activity_logs_collection.create_index("timestamp")
+                self.activity_logs_collection.create_index([("timestamp", -1), ("id", -1)])
                 self.activity_logs_collection.create_index("action")
             
+            self._drop_superseded_indexes()
+            self._ensure_audit_ttl_index()
+            
             logger.info("Database indexes created successfully")
         except Exception as e:
             logger.error(f"Failed to create database indexes: {str(e)}")
     
+    def _paginate(self, collection: Collection, sort_field: str, after: Optional[Tuple[Any, str]] = None,
+                  limit: int = 10, projection: Optional[Dict[str, Any]] = None
+                  ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]:
+        """Read one page newest first, starting after the (sort_field, id) key of the previous page.
+        
+        Seeking on the compound index costs the same at any depth, whereas
+        skip() walks every earlier entry.
+        """
+        query: Dict[str, Any] = {}
+        if after is not None:
+            value, record_id = after
+            query = {'$or': [
+                {sort_field: {'$lt': value}},
+                {sort_field: value, 'id': {'$lt': record_id}}
+            ]}
+        
+        cursor = collection.find(query, projection).sort([(sort_field, -1), ('id', -1)]).limit(limit)
+        records = list(cursor)
+        if len(records) < limit:
+            return records, None
+        return records, (records[-1][sort_field], records[-1]['id'])
+    
+    def _insert_many(self, collection: Optional[Collection], entity_type: str, records: List[Any]) -> List[str]:
+        """Insert model records in one unordered batch and return the ids that were written.
+        
+        A duplicate or invalid record fails on its own without stopping the rest.
+        """
+        if collection is None:
+            logger.error(f"{entity_type.capitalize()} collection not initialized. Cannot create {entity_type}s.")
+            return []
+        if not records:
+            return []
+        
+        failed = set()
+        try:
+            collection.insert_many([record.to_dict() for record in records], ordered=False)
+        except BulkWriteError as e:
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            logger.error(f"Failed to create {len(failed)} of {len(records)} {entity_type}s: {str(e)}")
+        except Exception as e:
+            logger.error(f"Failed to create {entity_type}s: {str(e)}")
+            return []
+        
+        inserted_ids = [record.id for index, record in enumerate(records) if index not in failed]
+        for record_id in inserted_ids:
+            self.log_activity('CREATE', entity_type, record_id)
+        logger.info(f"Created {len(inserted_ids)} {entity_type}s")
+        return inserted_ids
+    
+    def _ensure_extracted_patient_index(self):
+        """Create the unique index that serializes concurrent upsert_patient() calls.
+        
+        Existing duplicates make the build fail; that is logged without
+        blocking the other indexes, and upserts still dedupe best-effort.
+        """
+        try:
+            self.patients_collection.create_index(
+                [("first_name", 1), ("last_name", 1), ("date_of_birth", 1)],
+                name=EXTRACTED_PATIENT_INDEX,
+                unique=True,
+                collation=NAME_COLLATION,
+                partialFilterExpression=EXTRACTED_PATIENT_FILTER
+            )
+        except OperationFailure as e:
+            logger.warning(f"Could not create unique extracted patient index: {str(e)}")
+    
+    def _drop_superseded_indexes(self):
+        """Drop indexes replaced by the collation and compound indexes.
+        
+        A case-sensitive name index is never chosen for collated lookups and
+        only adds write cost.
+        """
+        for collection_name, index_names in _SUPERSEDED_INDEXES.items():
+            collection = self.db[collection_name]
+            existing = collection.index_information()
+            for index_name in index_names:
+                if index_name in existing and self._drop_index(collection, index_name):
+                    logger.info(f"Dropped superseded index {collection_name}.{index_name}")
+    
+    @staticmethod
+    def _drop_index(collection: Collection, index_name: str) -> bool:
+        """Drop an index, returning False if another worker booting alongside dropped it first."""
+        try:
+            collection.drop_index(index_name)
+        except OperationFailure as e:
+            if e.code != INDEX_NOT_FOUND:
+                raise
+            return False
+        return True
+    
+    def _ensure_audit_ttl_index(self):
+        """Keep the activity log TTL index in line with AUDIT_TTL_SECONDS.
+        
+        TTL indexes must be single-field, so this sits alongside the
+        compound (timestamp, id) index used for paging.
+        """
+        existing = self.activity_logs_collection.index_information().get(AUDIT_TTL_INDEX)
+        if not AUDIT_TTL_SECONDS:
+            if existing is not None and self._drop_index(self.activity_logs_collection, AUDIT_TTL_INDEX):
+                logger.info("Activity log expiry disabled")
+            return
+        
+        if existing is None:
+            self.activity_logs_collection.create_index(
+                "timestamp",
+                name=AUDIT_TTL_INDEX,
+                expireAfterSeconds=AUDIT_TTL_SECONDS
+            )
+        elif existing.get('expireAfterSeconds') != AUDIT_TTL_SECONDS:
+            # create_index rejects changed options on an existing index
+            self.db.command('collMod', self.activity_logs_collection.name, index={
+                'name': AUDIT_TTL_INDEX,
+                'expireAfterSeconds': AUDIT_TTL_SECONDS
+            })
+        logger.info(f"Activity logs expire after {AUDIT_TTL_SECONDS} seconds")
+    
+    def _watch_cached_collections(self):
+        """Evict cached patients and orders as soon as they change in MongoDB.
+        
+        Caching is only switched on once the stream is open. Change streams
+        need a replica set, and on a standalone server other workers' writes
+        would otherwise go unseen for a full TTL.
+        """
+        caches = {'patients': self._patient_cache, 'orders': self._order_cache}
+        pipeline = [{'$match': {
+            'ns.coll': {'$in': list(caches)},
+            'operationType': {'$in': ['update', 'replace', 'delete']}
+        }}]
+        try:
+            with self.db.watch(pipeline, full_document='updateLookup') as stream:
+                self._change_stream = stream
+                for cache in caches.values():
+                    cache.ttl = ENTITY_CACHE_TTL
+                for change in stream:
+                    cache = caches[change['ns']['coll']]
+                    record_id = (change.get('fullDocument') or {}).get('id')
+                    if record_id:
+                        cache.pop(record_id)
+                    else:
+                        # Delete events only carry the _id
+                        object_id = change['documentKey']['_id']
+                        cache.discard_if(lambda data: data.get('_id') == object_id)
+        except OperationFailure as e:
+            logger.info(f"Change streams unavailable, patient and order lookups are not cached: {str(e)}")
+        except PyMongoError as e:
+            # close() clears _change_stream before closing it on shutdown
+            if self._change_stream is not None:
+                logger.warning(f"Cache invalidation stopped: {str(e)}")
+        finally:
+            # Without invalidation, stale entries could live for a full TTL
+            for cache in caches.values():
+                cache.ttl = 0
+                cache.clear()
+    
     def log_activity(self, action: str, entity_type: str, entity_id: str, 
-                    details: Optional[Dict[str, Any]] = None):
-        """Log user activity for audit trails."""
+                    details: Optional[Dict[str, Any]] = None, critical: bool = False):
+        """Log user activity for audit trails.
+        
+        Entries are buffered and written in batches by a background thread;
+        critical entries are written before returning.
+        """
         if self.activity_logs_collection is None:
             logger.warning("Activity logs collection not initialized. Cannot log activity.")
             return
         
+        log_entry = {
+            'id': str(random_uuid()),
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'details': details or {},
+            'timestamp': datetime.utcnow(),
+            'ip_address': None,  # Could be extracted from request context
+            'user_agent': None   # Could be extracted from request context
+        }
+        
+        if critical:
+            try:
+                self.activity_logs_collection.insert_one(log_entry)
+                logger.info(f"Activity logged: {action} on {entity_type} {entity_id}")
+            except Exception as e:
+                logger.error(f"Failed to log activity: {str(e)}")
+            return
+        
+        self._audit_buffer.append(log_entry)
+        self._start_audit_flusher()
+        if len(self._audit_buffer) >= AUDIT_BATCH_SIZE:
+            self._audit_wakeup.set()
+    
+    def flush_audit(self):
+        """Write all buffered activity log entries in one batch.
+        
+        A batch that fails to reach MongoDB goes back into the buffer for
+        the next flush.
+        """
+        if self.activity_logs_collection is None:
+            return
+        
+        # log_activity() appends without the lock; popleft() is atomic, so
+        # entries added while draining stay in the buffer for the next flush
+        batch = []
+        with self._audit_lock:
+            try:
+                while True:
+                    batch.append(self._audit_buffer.popleft())
+            except IndexError:
+                pass
+        if not batch:
+            return
+        
         try:
-            log_entry = {
-                'id': str(uuid.uuid4()),
-                'action': action,
-                'entity_type': entity_type,
-                'entity_id': entity_id,
-                'details': details or {},
-                'timestamp': datetime.utcnow(),
-                'ip_address': None,  # Could be extracted from request context
-                'user_agent': None   # Could be extracted from request context
-            }
-            
-            self.activity_logs_collection.insert_one(log_entry)
-            logger.info(f"Activity logged: {action} on {entity_type} {entity_id}")
-            
+            self.activity_logs_collection.insert_many(batch, ordered=False)
+            logger.info(f"Activity logged: {len(batch)} entries")
+        except BulkWriteError as e:
+            # Entries MongoDB rejected would fail again; the rest were written
+            rejected = len(e.details.get('writeErrors', []))
+            logger.error(f"Failed to log {rejected} of {len(batch)} activities: {str(e)}")
         except Exception as e:
-            logger.error(f"Failed to log activity: {str(e)}")
+            logger.error(f"Failed to log {len(batch)} activities, retrying on the next flush: {str(e)}")
+            self._requeue_audit(batch)
+    
+    def _requeue_audit(self, batch: List[Dict[str, Any]]):
+        """Put a failed batch back ahead of newer entries, keeping at most AUDIT_BUFFER_MAX."""
+        self._audit_buffer.extendleft(reversed(batch))
+        dropped = 0
+        try:
+            while len(self._audit_buffer) > AUDIT_BUFFER_MAX:
+                self._audit_buffer.popleft()
+                dropped += 1
+        except IndexError:
+            pass
+        if dropped:
+            logger.error(f"Activity log buffer full, dropped {dropped} oldest entries")
+    
+    def _start_audit_flusher(self):
+        if self._audit_thread is not None:
+            return
+        with self._audit_lock:
+            if self._audit_thread is None:
+                self._audit_thread = threading.Thread(
+                    target=self._audit_flush_loop, name='audit-flush', daemon=True
+                )
+                self._audit_thread.start()
+    
+    def _audit_flush_loop(self):
+        while True:
+            # Flush on the interval, or early once the batch size is reached
+            self._audit_wakeup.wait(AUDIT_FLUSH_INTERVAL)
+            self._audit_wakeup.clear()
+            self.flush_audit()
     
     # Patient CRUD Operations
     def create_patient(self, patient: Patient) -> bool:
@@ -114,6 +456,10 @@ class DatabaseService:
             logger.error(f"Failed to create patient: {str(e)}")
             return False
     
+    def create_patients_bulk(self, patients: List[Patient]) -> List[str]:
+        """Create many patients with a single insert_many; returns the created ids."""
+        return self._insert_many(self.patients_collection, 'patient', patients)
+    
     def get_patient(self, patient_id: str) -> Optional[Patient]:
         """Retrieve a patient by ID."""
         if self.patients_collection is None:
@@ -121,10 +467,17 @@ class DatabaseService:
             return None
         
         try:
-            patient_data = self.patients_collection.find_one({'id': patient_id})
+            patient_data = self._patient_cache.get(patient_id)
+            if patient_data is None:
+                # An update between find_one() and set() must not be overwritten by this read
+                generation = self._patient_cache.generation
+                patient_data = self.patients_collection.find_one({'id': patient_id})
+                if patient_data:
+                    self._patient_cache.set(patient_id, patient_data, generation)
             
             if patient_data:
-                self.log_activity('READ', 'patient', patient_id)
+                if AUDIT_READS:
+                    self.log_activity('READ', 'patient', patient_id)
                 return Patient.from_dict(patient_data)
             return None
             
@@ -149,30 +502,87 @@ class DatabaseService:
             logger.error(f"Failed to retrieve patients: {str(e)}")
             return []
     
-    def update_patient(self, patient_id: str, updates: Dict[str, Any]) -> bool:
-        """Update patient information."""
+    def get_patients_page(self, skip: int = 0, limit: int = 10,
+                          fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Retrieve one page of patients as plain dicts with the total count.
+        
+        fields limits the returned keys, e.g. ['id', 'first_name', 'last_name'].
+        """
+        if self.patients_collection is None:
+            logger.error("Patients collection not initialized. Cannot retrieve patients.")
+            return [], 0
+        
+        try:
+            # Stored documents already have the to_dict() shape, so skip
+            # building Patient objects just to serialize them again
+            cursor = (self.patients_collection.find({}, _projection(fields))
+                      .sort('created_at', -1).skip(skip).limit(limit))
+            patients, total = run_concurrently(
+                lambda: list(cursor),
+                self.patients_collection.estimated_document_count
+            )
+            
+            self.log_activity('LIST', 'patient', 'all', {'count': len(patients)})
+            return patients, total
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve patients: {str(e)}")
+            return [], 0
+    
+    def get_patients_after(self, cursor: Optional[str] = None, limit: int = 10,
+                           fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retrieve patients newest first from an opaque page cursor.
+        
+        Returns the page as plain dicts, limited to fields when given, and
+        the cursor for the next page.
+        Raises ValueError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if self.patients_collection is None:
+            logger.error("Patients collection not initialized. Cannot retrieve patients.")
+            return [], None
+        
+        try:
+            patients, next_after = self._paginate(
+                self.patients_collection, 'created_at', after, limit,
+                _projection(fields, 'id', 'created_at')
+            )
+            
+            self.log_activity('LIST', 'patient', 'all', {'count': len(patients)})
+            return patients, encode_cursor(*next_after) if next_after else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve patients: {str(e)}")
+            return [], None
+    
+    def update_patient(self, patient_id: str, updates: Dict[str, Any]) -> Optional[Patient]:
+        """Update patient information and return the updated patient."""
         if self.patients_collection is None:
             logger.error("Patients collection not initialized. Cannot update patient.")
-            return False
+            return None
         
         try:
             # Add updated timestamp
             updates['updated_at'] = datetime.utcnow()
             
-            result = self.patients_collection.update_one(
-                {'id': patient_id}, 
-                {'$set': updates}
+            # Return the post-update document so callers don't read it back
+            patient_data = self.patients_collection.find_one_and_update(
+                {'id': patient_id},
+                {'$set': updates},
+                projection={'_id': 0},
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.modified_count > 0:
+            self._patient_cache.pop(patient_id)
+            if patient_data:
                 self.log_activity('UPDATE', 'patient', patient_id, updates)
                 logger.info(f"Patient updated successfully: {patient_id}")
-                return True
-            return False
+                return Patient.from_dict(patient_data)
+            return None
             
         except Exception as e:
             logger.error(f"Failed to update patient {patient_id}: {str(e)}")
-            return False
+            return None
     
     def find_patient_by_name(self, first_name: str, last_name: str) -> Optional[Patient]:
         """Find patient by name (for avoiding duplicates)."""
@@ -181,10 +591,12 @@ class DatabaseService:
             return None
         
         try:
-            patient_data = self.patients_collection.find_one({
-                'first_name': {'$regex': f'^{first_name}$', '$options': 'i'},
-                'last_name': {'$regex': f'^{last_name}$', '$options': 'i'}
-            })
+            # Equality under the index collation is an index seek; an
+            # anchored case-insensitive regex had to scan every name
+            patient_data = self.patients_collection.find_one(
+                {'first_name': first_name, 'last_name': last_name},
+                collation=NAME_COLLATION
+            )
             
             if patient_data:
                 return Patient.from_dict(patient_data)
@@ -194,6 +606,84 @@ class DatabaseService:
             logger.error(f"Failed to find patient by name: {str(e)}")
             return None
     
+    def search_patients_by_prefix(self, first_name: str, last_name: Optional[str] = None,
+                                  limit: int = 10) -> List[Dict[str, Any]]:
+        """Find patients whose name starts with the given text, ignoring case.
+        
+        Without last_name, first_name is a prefix; with it, first_name must
+        match exactly and last_name is the prefix. Either way the query is a
+        bounded range on the patient_name_ci index.
+        """
+        if self.patients_collection is None:
+            logger.error("Patients collection not initialized. Cannot search patients.")
+            return []
+        
+        try:
+            # U+FFFF sorts after every character under ICU collations,
+            # so [prefix, prefix + U+FFFF) holds exactly the prefixed names
+            if last_name is None:
+                query = {'first_name': {'$gte': first_name, '$lt': first_name + NAME_PREFIX_END}}
+            else:
+                query = {
+                    'first_name': first_name,
+                    'last_name': {'$gte': last_name, '$lt': last_name + NAME_PREFIX_END}
+                }
+            
+            cursor = (self.patients_collection.find(query, {'_id': 0}, collation=NAME_COLLATION)
+                      .sort([('first_name', 1), ('last_name', 1)]).limit(limit))
+            return list(cursor)
+            
+        except Exception as e:
+            logger.error(f"Failed to search patients by prefix: {str(e)}")
+            return []
+    
+    def upsert_patient(self, first_name: str, last_name: str, date_of_birth: Optional[str] = None,
+                       extracted_from: Optional[str] = None) -> Tuple[Optional[str], bool]:
+        """Find an extracted patient by name and date of birth or create one in a single round trip.
+        
+        Returns the patient id and whether a new record was created.
+        """
+        if self.patients_collection is None:
+            logger.error("Patients collection not initialized. Cannot upsert patient.")
+            return None, False
+        
+        try:
+            patient = Patient(
+                first_name=first_name,
+                last_name=last_name,
+                date_of_birth=date_of_birth,
+                extracted_from=extracted_from
+            )
+            # Same key and collation as the unique extracted patient index
+            query = {'first_name': first_name, 'last_name': last_name,
+                     'date_of_birth': date_of_birth, **EXTRACTED_PATIENT_FILTER}
+            try:
+                patient_data = self.patients_collection.find_one_and_update(
+                    query,
+                    {'$setOnInsert': patient.to_dict()},
+                    projection={'_id': 0, 'id': 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                    collation=NAME_COLLATION
+                )
+            except DuplicateKeyError:
+                # A concurrent upsert inserted the same patient first
+                patient_data = self.patients_collection.find_one(
+                    query, {'_id': 0, 'id': 1}, collation=NAME_COLLATION
+                )
+            
+            if patient_data is None:
+                return None, False
+            
+            created = patient_data['id'] == patient.id
+            if created:
+                self.log_activity('CREATE', 'patient', patient.id)
+            return patient_data['id'], created
+            
+        except Exception as e:
+            logger.error(f"Failed to upsert patient: {str(e)}")
+            return None, False
+    
     # Order CRUD Operations
     def create_order(self, order: Order) -> bool:
         """Create a new order."""
@@ -214,6 +704,10 @@ class DatabaseService:
             logger.error(f"Failed to create order: {str(e)}")
             return False
     
+    def create_orders_bulk(self, orders: List[Order]) -> List[str]:
+        """Create many orders with a single insert_many; returns the created ids."""
+        return self._insert_many(self.orders_collection, 'order', orders)
+    
     def get_order(self, order_id: str) -> Optional[Order]:
         """Retrieve an order by ID."""
         if self.orders_collection is None:
@@ -221,10 +715,17 @@ class DatabaseService:
             return None
         
         try:
-            order_data = self.orders_collection.find_one({'id': order_id})
+            order_data = self._order_cache.get(order_id)
+            if order_data is None:
+                # An update between find_one() and set() must not be overwritten by this read
+                generation = self._order_cache.generation
+                order_data = self.orders_collection.find_one({'id': order_id})
+                if order_data:
+                    self._order_cache.set(order_id, order_data, generation)
             
             if order_data:
-                self.log_activity('read', 'order', order_id)
+                if AUDIT_READS:
+                    self.log_activity('read', 'order', order_id)
                 return Order.from_dict(order_data)
             return None
             
@@ -249,30 +750,81 @@ class DatabaseService:
             logger.error(f"Failed to retrieve orders: {str(e)}")
             return []
     
-    def update_order(self, order_id: str, updates: Dict[str, Any]) -> bool:
-        """Update order information."""
+    def get_orders_by_patient(self, patient_id: str, fields: Optional[List[str]] = None) -> List[Order]:
+        """Retrieve all orders for a patient, newest first.
+        
+        With fields, only those attributes are loaded; the rest keep their defaults.
+        """
+        if self.orders_collection is None:
+            logger.error("Orders collection not initialized. Cannot retrieve orders.")
+            return []
+        
+        try:
+            cursor = (self.orders_collection.find({'patient_id': patient_id}, _projection(fields))
+                      .sort('created_at', -1))
+            orders = [Order.from_dict(data) for data in cursor]
+            
+            self.log_activity('LIST', 'order', patient_id, {'count': len(orders)})
+            return orders
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve orders for patient {patient_id}: {str(e)}")
+            return []
+    
+    def get_orders_after(self, cursor: Optional[str] = None, limit: int = 10,
+                         fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retrieve orders newest first from an opaque page cursor.
+        
+        Returns the page as plain dicts, limited to fields when given, and
+        the cursor for the next page.
+        Raises ValueError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if self.orders_collection is None:
+            logger.error("Orders collection not initialized. Cannot retrieve orders.")
+            return [], None
+        
+        try:
+            orders, next_after = self._paginate(
+                self.orders_collection, 'created_at', after, limit,
+                _projection(fields, 'id', 'created_at')
+            )
+            
+            self.log_activity('LIST', 'order', 'all', {'count': len(orders)})
+            return orders, encode_cursor(*next_after) if next_after else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve orders: {str(e)}")
+            return [], None
+    
+    def update_order(self, order_id: str, updates: Dict[str, Any]) -> Optional[Order]:
+        """Update order information and return the updated order."""
         if self.orders_collection is None:
             logger.error("Orders collection not initialized. Cannot update order.")
-            return False
+            return None
         
         try:
             # Add updated timestamp
             updates['updated_at'] = datetime.utcnow()
             
-            result = self.orders_collection.update_one(
-                {'id': order_id}, 
-                {'$set': updates}
+            # Return the post-update document so callers don't read it back
+            order_data = self.orders_collection.find_one_and_update(
+                {'id': order_id},
+                {'$set': updates},
+                projection={'_id': 0},
+                return_document=ReturnDocument.AFTER
             )
             
-            if result.modified_count > 0:
+            self._order_cache.pop(order_id)
+            if order_data:
                 self.log_activity('UPDATE', 'order', order_id, updates)
                 logger.info(f"Order updated successfully: {order_id}")
-                return True
-            return False
+                return Order.from_dict(order_data)
+            return None
             
         except Exception as e:
             logger.error(f"Failed to update order {order_id}: {str(e)}")
-            return False
+            return None
     
     def delete_order(self, order_id: str) -> bool:
         """Delete an order."""
@@ -282,9 +834,10 @@ class DatabaseService:
         
         try:
             result = self.orders_collection.delete_one({'id': order_id})
+            self._order_cache.pop(order_id)
             
             if result.deleted_count > 0:
-                self.log_activity('DELETE', 'order', order_id)
+                self.log_activity('DELETE', 'order', order_id, critical=True)
                 logger.info(f"Order deleted successfully: {order_id}")
                 return True
             return False
@@ -313,6 +866,10 @@ class DatabaseService:
             logger.error(f"Failed to create document: {str(e)}")
             return False
     
+    def create_documents_bulk(self, documents: List[Document]) -> List[str]:
+        """Create many documents with a single insert_many; returns the created ids."""
+        return self._insert_many(self.documents_collection, 'document', documents)
+    
     def get_document(self, document_id: str) -> Optional[Document]:
         """Retrieve a document by ID."""
         if self.documents_collection is None:
@@ -323,7 +880,8 @@ class DatabaseService:
             doc_data = self.documents_collection.find_one({'id': document_id})
             
             if doc_data:
-                self.log_activity('read', 'document', document_id)
+                if AUDIT_READS:
+                    self.log_activity('read', 'document', document_id)
                 return Document.from_dict(doc_data)
             return None
             
@@ -331,22 +889,37 @@ class DatabaseService:
             logger.error(f"Failed to retrieve document {document_id}: {str(e)}")
             return None
     
-    def get_documents_by_order(self, order_id: str) -> List[Document]:
-        """Retrieve all documents for a specific order."""
+    def iter_documents_by_order(self, order_id: str, fields: Optional[List[str]] = None) -> Iterator[Document]:
+        """Yield the documents of an order, newest first, as the cursor receives them.
+        
+        Only STREAM_BATCH_SIZE records are held in memory at a time. With
+        fields, only those attributes are loaded; the rest keep their defaults.
+        A selection within DOCUMENT_INDEX_FIELDS is answered from the index alone.
+        """
         if self.documents_collection is None:
             logger.error("Documents collection not initialized. Cannot retrieve documents.")
-            return []
+            return
         
+        count = 0
+        cursor = (self.documents_collection.find({'order_id': order_id}, _projection(fields))
+                  .sort('created_at', -1))
         try:
-            cursor = self.documents_collection.find({'order_id': order_id})
-            documents = [Document.from_dict(data) for data in cursor]
-            
-            self.log_activity('LIST', 'document', order_id, {'count': len(documents)})
-            return documents
-            
+            for data in cursor.batch_size(STREAM_BATCH_SIZE):
+                count += 1
+                yield Document.from_dict(data)
         except Exception as e:
             logger.error(f"Failed to retrieve documents for order {order_id}: {str(e)}")
-            return []
+        finally:
+            cursor.close()
+        
+        self.log_activity('LIST', 'document', order_id, {'count': count})
+    
+    def get_documents_by_order(self, order_id: str, fields: Optional[List[str]] = None) -> List[Document]:
+        """Retrieve all documents for a specific order.
+        
+        With fields, only those attributes are loaded; the rest keep their defaults.
+        """
+        return list(self.iter_documents_by_order(order_id, fields))
     
     def update_document(self, document_id: str, updates: Dict[str, Any]) -> bool:
         """Update document information."""
@@ -363,8 +936,9 @@ class DatabaseService:
                 {'$set': updates}
             )
             
-            if result.modified_count > 0:
-                self.log_activity('UPDATE', 'document', document_id, updates)
+            if result.matched_count > 0:
+                # Log field names only; the update can carry the full extracted text
+                self.log_activity('UPDATE', 'document', document_id, {'fields': sorted(updates)})
                 logger.info(f"Document updated successfully: {document_id}")
                 return True
             return False
@@ -387,6 +961,31 @@ class DatabaseService:
             logger.error(f"Failed to retrieve activity logs: {str(e)}")
             return []
 
+    def get_activity_logs_after(self, cursor: Optional[str] = None, limit: int = 50,
+                                fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retrieve activity logs newest first from an opaque page cursor.
+        
+        Raises ValueError for a malformed cursor.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            # Log timestamps are stored as datetimes; cursors carry them as ISO strings
+            after = (coerce_datetime(after[0], default_now=False), after[1])
+        if self.activity_logs_collection is None:
+            logger.error("Activity logs collection not initialized. Cannot retrieve logs.")
+            return [], None
+        
+        try:
+            logs, next_after = self._paginate(
+                self.activity_logs_collection, 'timestamp', after, limit,
+                _projection(fields, 'id', 'timestamp')
+            )
+            return logs, encode_cursor(*next_after) if next_after else None
+            
+        except Exception as e:
+            logger.error(f"Failed to retrieve activity logs: {str(e)}")
+            return [], None
+
 
 # Global database service instance
 db_service = DatabaseService()
\ No newline at end of file
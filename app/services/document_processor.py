@@ -1,47 +1,231 @@
+import io
 import os
 import re
+import time
+import hashlib
 import logging
-from typing import Dict, Any, Optional, Tuple
-from datetime import datetime
-from docx import Document as DocxDocument
+import functools
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import IO, Dict, Any, List, Optional, Tuple, Union
+
+from app.utils.cache import TTLCache
+
+# Optional multi-pattern scanner; the compiled re patterns are used without it
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Optional keyword prefilter for the re fallback
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Extracted patient data by digest of the cleaned text, so re-uploads and
+# reprocessing of identical documents skip the field scan. Extraction is
+# deterministic, so entries only leave by LRU eviction; 0 disables.
+EXTRACTION_CACHE_SIZE = int(os.getenv('EXTRACTION_CACHE_SIZE', 1024))
+_extraction_cache = TTLCache(EXTRACTION_CACHE_SIZE, float('inf'))
+
+def _text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+# Patient data extraction patterns per field, in priority order. Each has
+# a single capture group at the end holding the value.
+FIELD_PATTERNS = {
+    'name': (
+        r'patient\s*name[:\s]+([a-zA-Z\s,]+)',
+        r'name[:\s]+([a-zA-Z\s,]+)',
+        r'last\s*name[:\s]+([a-zA-Z\s]+)',
+        r'first\s*name[:\s]+([a-zA-Z\s]+)',
+    ),
+    'date_of_birth': (
+        r'date\s*of\s*birth[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
+        r'dob[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
+        r'birth\s*date[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
+        r'born[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
+    ),
+    'medical_record_number': (
+        r'mrn[:\s]+(\w+)',
+        r'medical\s*record\s*number[:\s]+(\w+)',
+        r'patient\s*id[:\s]+(\w+)',
+        r'id\s*number[:\s]+(\w+)',
+    ),
+    'diagnosis': (
+        r'diagnosis[:\s]+([^\.]+)',
+        r'primary\s*diagnosis[:\s]+([^\.]+)',
+        r'condition[:\s]+([^\.]+)',
+    ),
+}
+
+def _compile_patterns(patterns: Tuple[str, ...]) -> Tuple[re.Pattern, ...]:
+    """Compile single-group patterns case-insensitively, keeping their priority order."""
+    return tuple(re.compile(pattern, re.IGNORECASE) for pattern in patterns)
+
+def _best_match(patterns: Tuple[re.Pattern, ...], text: str) -> Optional[str]:
+    """Return the capture of the highest-priority pattern that matches."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+def _pattern_keyword(pattern: str) -> str:
+    """Return the longest literal word a pattern must match before its capture."""
+    head = re.sub(r'\\.|\[[^\]]*\]', ' ', pattern.split('(', 1)[0])
+    return max(re.findall(r'[a-z]+', head), key=len)
+
+class _KeywordPrefilter:
+    """Skip patterns whose keyword does not occur in the text.
+    
+    One Aho-Corasick pass over the lowercased text finds which keywords
+    appear, so patterns that cannot match are never run. The text is
+    lowercased a window at a time rather than copied whole, and the scan
+    stops once every keyword has been seen.
+    """
+    
+    WINDOW = 64 * 1024
+    
+    def __init__(self, field_patterns: Dict[str, Tuple[re.Pattern, ...]]):
+        self._field_patterns = {
+            field: tuple((_pattern_keyword(pattern.pattern), pattern) for pattern in patterns)
+            for field, patterns in field_patterns.items()
+        }
+        self._automaton = ahocorasick.Automaton()
+        for patterns in self._field_patterns.values():
+            for keyword, _ in patterns:
+                self._automaton.add_word(keyword, keyword)
+        self._automaton.make_automaton()
+        self._keyword_count = len(self._automaton)
+        # Windows overlap so a keyword straddling a boundary is still found
+        self._overlap = max(len(keyword) for keyword in self._automaton.keys()) - 1
+    
+    def select(self, text: str) -> Dict[str, Tuple[re.Pattern, ...]]:
+        """Return each field's patterns whose keyword occurs in text, in priority order."""
+        present = set()
+        for start in range(0, len(text), self.WINDOW):
+            window = text[start:start + self.WINDOW + self._overlap].lower()
+            present.update(keyword for _, keyword in self._automaton.iter(window))
+            if len(present) == self._keyword_count:
+                break
+        return {
+            field: tuple(pattern for keyword, pattern in patterns if keyword in present)
+            for field, patterns in self._field_patterns.items()
+        }
+
+class _HyperscanScanner:
+    """Find the first match of every field pattern in one Hyperscan pass.
+    
+    Hyperscan does not report capture groups, so it only locates where
+    each pattern first matches; the Python pattern then reads the value
+    from that offset.
+    """
+    
+    FLAGS = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST |
+             hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP) if HYPERSCAN_AVAILABLE else 0
+    
+    def __init__(self, field_patterns: Dict[str, Tuple[str, ...]]):
+        self._fields = tuple(field_patterns)
+        # (field, compiled pattern) by expression id; ids follow priority order
+        self._patterns: List[Tuple[str, re.Pattern]] = []
+        expressions = []
+        for field, patterns in field_patterns.items():
+            for pattern in patterns:
+                head, capture = pattern.split('(', 1)
+                capture = capture[:-1]
+                # One character of a repeated capture is enough to locate the
+                # match and keeps Hyperscan from reporting every end offset
+                if capture.endswith('+'):
+                    capture = capture[:-1]
+                expressions.append((head + capture).encode())
+                self._patterns.append((field, re.compile(pattern, re.IGNORECASE)))
+        
+        self._database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self._database.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[self.FLAGS] * len(expressions)
+        )
+        # Scratch space cannot be shared by concurrent scans
+        self._local = threading.local()
+    
+    def extract(self, text: str) -> Dict[str, Optional[str]]:
+        """Return each field's value from its highest-priority matching pattern."""
+        scratch = getattr(self._local, 'scratch', None)
+        if scratch is None:
+            scratch = self._local.scratch = hyperscan.Scratch(self._database)
+        
+        data = text.encode('utf-8')
+        starts: Dict[int, int] = {}
+        
+        def on_match(expression_id, start, end, flags, context):
+            if start < starts.get(expression_id, len(data)):
+                starts[expression_id] = start
+        
+        self._database.scan(data, match_event_handler=on_match, scratch=scratch)
+        
+        values: Dict[str, Optional[str]] = dict.fromkeys(self._fields)
+        for expression_id in sorted(starts):
+            field, regex = self._patterns[expression_id]
+            if values[field] is not None:
+                continue
+            start = starts[expression_id]
+            if len(data) != len(text):
+                # Byte offset to character offset
+                start = len(data[:start].decode('utf-8'))
+            match = regex.match(text, start)
+            if match:
+                values[field] = match.group(1).strip()
+        return values
+
+@functools.lru_cache(maxsize=None)
+def _field_matchers() -> Tuple[Dict[str, Tuple[re.Pattern, ...]],
+                               Optional[_HyperscanScanner], Optional[_KeywordPrefilter]]:
+    """Build the compiled field patterns, scanner and prefilter once per process.
+    
+    Compiling the Hyperscan database takes over 100ms, so processors share
+    it instead of each compiling their own.
+    """
+    field_patterns = {field: _compile_patterns(patterns) for field, patterns in FIELD_PATTERNS.items()}
+    scanner = _HyperscanScanner(FIELD_PATTERNS) if HYPERSCAN_AVAILABLE else None
+    prefilter = _KeywordPrefilter(field_patterns) if AHOCORASICK_AVAILABLE else None
+    return field_patterns, scanner, prefilter
+
+# WordprocessingML tags read by _extract_docx_text
+_W_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_PARAGRAPH = _W_NAMESPACE + 'p'
+_W_RUN = _W_NAMESPACE + 'r'
+_W_TEXT = _W_NAMESPACE + 't'
+_W_TAB = _W_NAMESPACE + 'tab'
+_W_BREAKS = (_W_NAMESPACE + 'br', _W_NAMESPACE + 'cr')
+
 class DocumentProcessor:
     
     def __init__(self, tesseract_path: Optional[str] = None, poppler_path: Optional[str] = None):
         self.tesseract_path = tesseract_path
         self.poppler_path = poppler_path
-        # Only support text-based formats for now
-        self.supported_formats = {'.docx', '.txt'}
-        
-        # Patient data extraction patterns
-        self.name_patterns = [
-            r'patient\s*name[:\s]+([a-zA-Z\s,]+)',
-            r'name[:\s]+([a-zA-Z\s,]+)',
-            r'last\s*name[:\s]+([a-zA-Z\s]+)',
-            r'first\s*name[:\s]+([a-zA-Z\s]+)',
-        ]
-        
-        self.dob_patterns = [
-            r'date\s*of\s*birth[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
-            r'dob[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
-            r'birth\s*date[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
-            r'born[:\s]+(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
-        ]
-        
-        self.mrn_patterns = [
-            r'mrn[:\s]+(\w+)',
-            r'medical\s*record\s*number[:\s]+(\w+)',
-            r'patient\s*id[:\s]+(\w+)',
-            r'id\s*number[:\s]+(\w+)',
-        ]
-        
-        self.diagnosis_patterns = [
-            r'diagnosis[:\s]+([^\.]+)',
-            r'primary\s*diagnosis[:\s]+([^\.]+)',
-            r'condition[:\s]+([^\.]+)',
-        ]
+        # Text extractor per extension; only text-based formats for now.
+        # Each takes a file path or a binary stream.
+        self._extractors = {
+            '.docx': self._extract_docx_text,
+            '.txt': self._extract_txt_text,
+        }
+        self.supported_formats = frozenset(self._extractors)
+        
+        # Shared by all processors; with Hyperscan all fields are located
+        # in a single pass over the text instead
+        self._field_patterns, self._scanner, self._prefilter = _field_matchers()
+        
+        # Text cleanup patterns
+        self._artifact_re = re.compile(r'[^\w\s\.\,\:\;\-\/\(\)]+')
     
     def process_document(self, file_path: str) -> Dict[str, Any]:
         """
@@ -53,84 +237,136 @@ class DocumentProcessor:
         Returns:
             Dict[str, Any]: Processing results with patient data
         """
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # Check file format
             file_extension = os.path.splitext(file_path)[1].lower()
             
-            if file_extension not in self.supported_formats:
-                return {
-                    'success': False,
-                    'extracted_text': '',
-                    'patient_data': {},
-                    'confidence_scores': {},
-                    'processing_time': None,
-                    'error_message': f'Unsupported file format: {file_extension}. Currently supported: {", ".join(self.supported_formats)}'
-                }
+            extract = self._extractors.get(file_extension)
+            if extract is None:
+                return self._unsupported_result(file_extension)
             
-            # Extract text based on file type
-            if file_extension == '.docx':
-                extracted_text = self._extract_docx_text(file_path)
-            elif file_extension == '.txt':
-                extracted_text = self._extract_txt_text(file_path)
-            else:
-                extracted_text = "OCR processing not available in current deployment"
+            return self._build_result(extract(file_path), start_time)
             
-            # Clean the extracted text
-            cleaned_text = self._clean_text(extracted_text)
+        except Exception as e:
+            logger.error(f"Document processing failed for {file_path}: {str(e)}")
+            return self._failed_result(str(e))
+    
+    def process_bytes(self, data: bytes, file_type: str) -> Dict[str, Any]:
+        """
+        Process an in-memory document without writing it to disk.
+        
+        Args:
+            data (bytes): Raw file contents
+            file_type (str): File extension including the dot, e.g. '.docx'
             
-            # Extract patient information
-            patient_data = self._extract_patient_info(cleaned_text)
+        Returns:
+            Dict[str, Any]: Processing results with patient data
+        """
+        start_time = time.perf_counter()
+        
+        try:
+            file_extension = file_type.lower()
             
-            # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            extract = self._extractors.get(file_extension)
+            if extract is None:
+                return self._unsupported_result(file_extension)
             
-            return {
-                'success': True,
-                'extracted_text': cleaned_text,
-                'patient_data': patient_data,
-                'confidence_scores': self._calculate_confidence_scores(patient_data, cleaned_text),
-                'processing_time': processing_time,
-                'error_message': None
-            }
+            return self._build_result(extract(io.BytesIO(data)), start_time)
             
         except Exception as e:
-            logger.error(f"Document processing failed for {file_path}: {str(e)}")
-            return {
-                'success': False,
-                'extracted_text': '',
-                'patient_data': {},
-                'confidence_scores': {},
-                'processing_time': None,
-                'error_message': str(e)
-            }
-    
-    def _extract_txt_text(self, file_path: str) -> str:
-        """Extract text from plain text files."""
+            logger.error(f"Document processing failed for in-memory {file_type} file: {str(e)}")
+            return self._failed_result(str(e))
+    
+    def _build_result(self, extracted_text: str, start_time: float) -> Dict[str, Any]:
+        """Clean extracted text and package the patient data found in it."""
+        # Clean the extracted text
+        cleaned_text = self._clean_text(extracted_text)
+        
+        # Extract patient information
+        patient_data = self._extract_patient_info(cleaned_text)
+        
+        # Calculate processing time
+        processing_time = time.perf_counter() - start_time
+        
+        return {
+            'success': True,
+            'extracted_text': cleaned_text,
+            'patient_data': patient_data,
+            'confidence_scores': self._calculate_confidence_scores(patient_data, cleaned_text),
+            'processing_time': processing_time,
+            'error_message': None
+        }
+    
+    def _unsupported_result(self, file_extension: str) -> Dict[str, Any]:
+        return self._failed_result(
+            f'Unsupported file format: {file_extension}. Currently supported: {", ".join(sorted(self.supported_formats))}'
+        )
+    
+    def _failed_result(self, error_message: str) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'extracted_text': '',
+            'patient_data': {},
+            'confidence_scores': {},
+            'processing_time': None,
+            'error_message': error_message
+        }
+    
+    def _extract_txt_text(self, source: Union[str, IO[bytes]]) -> str:
+        """Extract text from a plain text file path or binary stream."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            # Read raw bytes and decode once; text mode would also translate
+            # newlines, which _clean_text collapses anyway
+            if isinstance(source, str):
+                with open(source, 'rb') as file:
+                    data = file.read()
+            else:
+                data = source.read()
+            # Undecodable bytes become U+FFFD, which _clean_text strips
+            return data.decode('utf-8', errors='replace')
         except Exception as e:
             logger.error(f"Text file extraction failed: {str(e)}")
             raise e
     
-    def _extract_docx_text(self, file_path: str) -> str:
-        """Extract text from DOCX files."""
+    def _extract_docx_text(self, source: Union[str, IO[bytes]]) -> str:
+        """Extract text from a DOCX file path or binary stream.
+        
+        Streams word/document.xml instead of building python-docx objects.
+        Paragraphs come out in document order, including those inside table
+        cells; merged cells are read once.
+        """
         try:
-            doc = DocxDocument(file_path)
             text_parts = []
+            # Text of the paragraphs currently open; text boxes nest them
+            open_paragraphs: List[List[str]] = []
+            # Tab and break elements also appear in paragraph properties,
+            # so they only count inside a run
+            open_runs = 0
             
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
-            
-            # Also extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_parts.append(cell.text)
+            with zipfile.ZipFile(source) as archive, archive.open('word/document.xml') as xml:
+                for event, elem in ET.iterparse(xml, events=('start', 'end')):
+                    if event == 'start':
+                        if elem.tag == _W_PARAGRAPH:
+                            open_paragraphs.append([])
+                        elif elem.tag == _W_RUN:
+                            open_runs += 1
+                        continue
+                    if elem.tag == _W_RUN:
+                        open_runs -= 1
+                    elif elem.tag == _W_PARAGRAPH:
+                        text = ''.join(open_paragraphs.pop())
+                        if text.strip():
+                            text_parts.append(text)
+                        elem.clear()
+                    elif open_paragraphs and open_runs:
+                        if elem.tag == _W_TEXT:
+                            open_paragraphs[-1].append(elem.text or '')
+                        elif elem.tag == _W_TAB:
+                            open_paragraphs[-1].append('\t')
+                        elif elem.tag in _W_BREAKS:
+                            open_paragraphs[-1].append('\n')
             
             return '\n'.join(text_parts)
             
@@ -143,53 +379,53 @@ class DocumentProcessor:
         if not text:
             return ""
         
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s\.\,\:\;\-\/\(\)]', '', text)
-        
-        # Normalize line breaks
-        text = text.replace('\n\n', '\n').strip()
-        
-        return text
+        # Remove special characters but keep basic punctuation, then
+        # collapse all whitespace (including line breaks) in one pass
+        return ' '.join(self._artifact_re.sub('', text).split())
     
     def _extract_patient_info(self, text: str) -> Dict[str, Any]:
         """Extract structured patient information from text."""
+        key = _text_digest(text)
+        cached = _extraction_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+        
         patient_data = {}
         
-        # Convert to lowercase for pattern matching
-        text_lower = text.lower()
+        # The patterns are case-insensitive, so the text is matched as-is
+        # rather than through a lowercased copy
+        values = self._extract_fields(text)
         
         # Extract patient name
-        name = self._extract_pattern(text_lower, self.name_patterns)
+        name = values['name']
         if name:
             patient_data['name'] = name.title()
         
         # Extract date of birth
-        dob = self._extract_pattern(text_lower, self.dob_patterns)
+        dob = values['date_of_birth']
         if dob:
             patient_data['date_of_birth'] = self._normalize_date(dob)
         
         # Extract MRN
-        mrn = self._extract_pattern(text_lower, self.mrn_patterns)
+        mrn = values['medical_record_number']
         if mrn:
             patient_data['medical_record_number'] = mrn.upper()
         
         # Extract diagnosis
-        diagnosis = self._extract_pattern(text_lower, self.diagnosis_patterns)
+        diagnosis = values['diagnosis']
         if diagnosis:
             patient_data['diagnosis'] = diagnosis.title()
         
-        return patient_data
+        _extraction_cache.set(key, patient_data)
+        return dict(patient_data)
     
-    def _extract_pattern(self, text: str, patterns: list) -> Optional[str]:
-        """Extract text using regex patterns."""
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-        return None
+    def _extract_fields(self, text: str) -> Dict[str, Optional[str]]:
+        """Return the stripped captured value of every field, or None where nothing matched."""
+        if self._scanner is not None:
+            return self._scanner.extract(text)
+        field_patterns = self._prefilter.select(text) if self._prefilter is not None else self._field_patterns
+        values = {field: _best_match(patterns, text) for field, patterns in field_patterns.items()}
+        return {field: value.strip() if value is not None else None for field, value in values.items()}
     
     def _normalize_date(self, date_str: str) -> str:
         """Normalize date format."""
@@ -1,27 +1,52 @@
 """Simple in-memory database for testing without MongoDB."""
 
+import os
 import logging
-from typing import Dict, List, Any, Optional
+from collections import defaultdict, deque
+from itertools import islice
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
 
 from app.models.patient import Patient
 from app.models.order import Order
 from app.models.document import Document
+from app.utils.helpers import coerce_datetime, decode_cursor, encode_cursor, random_uuid
 
 logger = logging.getLogger(__name__)
 
+# Most recent activity log entries kept in memory; older ones are dropped
+ACTIVITY_LOG_CAP = int(os.getenv('ACTIVITY_LOG_CAP', 100000))
+
 class InMemoryDatabase:
+    # List methods accept the same fields argument as DatabaseService but
+    # return whole records; routes trim responses to the selection
     
     def __init__(self):
         self.patients = {}
+        self.patient_names = {}  # (first, last) lowercased -> first patient with that name
+        self.extracted_patients = {}  # (first, last) lowercased + dob -> patient from upsert_patient()
         self.orders = {}  
+        self.orders_by_patient = defaultdict(list)  # patient_id -> its orders, in insertion order
         self.documents = {}
-        self.activity_logs = []
+        self.documents_by_order = defaultdict(list)  # order_id -> its documents, in insertion order
+        self.activity_logs = deque(maxlen=ACTIVITY_LOG_CAP)
+    
+    def _paginate(self, records: List[Dict[str, Any]], sort_field: str,
+                  after: Optional[Tuple[Any, str]] = None,
+                  limit: int = 10) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, str]]]:
+        records.sort(key=lambda r: (r[sort_field], r['id']), reverse=True)
+        if after is not None:
+            records = [r for r in records if (r[sort_field], r['id']) < after]
+        page = records[:limit]
+        if len(page) < limit:
+            return page, None
+        return page, (page[-1][sort_field], page[-1]['id'])
     
     def log_activity(self, action: str, entity_type: str, entity_id: str, 
                     details: Optional[Dict[str, Any]] = None):
         """Log activity."""
         log_entry = {
+            'id': str(random_uuid()),
             'action': action,
             'entity_type': entity_type,
             'entity_id': entity_id,
@@ -31,53 +56,196 @@ class InMemoryDatabase:
         self.activity_logs.append(log_entry)
         logger.info(f"Activity logged: {action} on {entity_type} {entity_id}")
     
+    def _log_created(self, entity_type: str, entity_ids: List[str]):
+        """Record a CREATE entry per bulk-inserted entity, with one log line for the batch."""
+        timestamp = datetime.utcnow()
+        self.activity_logs.extend({
+            'id': str(random_uuid()),
+            'action': 'CREATE',
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'details': {},
+            'timestamp': timestamp
+        } for entity_id in entity_ids)
+        logger.info(f"Activity logged: CREATE on {len(entity_ids)} {entity_type} records")
+    
     # Patient operations
     def create_patient(self, patient: Patient) -> bool:
         self.patients[patient.id] = patient
+        self._reindex_name(patient, None)
         self.log_activity('CREATE', 'patient', patient.id)
         return True
     
+    def create_patients_bulk(self, patients: List[Patient]) -> List[str]:
+        self.patients.update((patient.id, patient) for patient in patients)
+        for patient in patients:
+            self._reindex_name(patient, None)
+        ids = [patient.id for patient in patients]
+        self._log_created('patient', ids)
+        return ids
+    
     def get_patient(self, patient_id: str) -> Optional[Patient]:
         return self.patients.get(patient_id)
     
     def get_patients(self, skip: int = 0, limit: int = 10) -> List[Patient]:
-        patient_list = list(self.patients.values())
-        return patient_list[skip:skip+limit]
+        return list(islice(self.patients.values(), skip, skip+limit))
     
-    def find_patient_by_name(self, first_name: str, last_name: str) -> Optional[Patient]:
-        for patient in self.patients.values():
-            if (patient.first_name and patient.first_name.lower() == first_name.lower() and
-                patient.last_name and patient.last_name.lower() == last_name.lower()):
-                return patient
+    def get_patients_page(self, skip: int = 0, limit: int = 10,
+                          fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        page = islice(self.patients.values(), skip, skip+limit)
+        return [patient.to_dict() for patient in page], len(self.patients)
+    
+    def get_patients_after(self, cursor: Optional[str] = None, limit: int = 10,
+                           fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        records = [patient.to_dict() for patient in self.patients.values()]
+        patients, next_after = self._paginate(records, 'created_at', after, limit)
+        return patients, encode_cursor(*next_after) if next_after else None
+    
+    def update_patient(self, patient_id: str, updates: Dict[str, Any]) -> Optional[Patient]:
+        if patient_id in self.patients:
+            patient = self.patients[patient_id]
+            old_key = self._name_key(patient)
+            old_extracted_key = self._extracted_key(patient)
+            for key, value in updates.items():
+                if hasattr(patient, key):
+                    setattr(patient, key, value)
+            patient.updated_at = datetime.utcnow()
+            self._reindex_name(patient, old_key)
+            if old_extracted_key is not None and self.extracted_patients.get(old_extracted_key) is patient:
+                del self.extracted_patients[old_extracted_key]
+                new_extracted_key = self._extracted_key(patient)
+                if new_extracted_key is not None:
+                    self.extracted_patients.setdefault(new_extracted_key, patient)
+            self.log_activity('UPDATE', 'patient', patient_id, updates)
+            return patient
+        return None
+    
+    @staticmethod
+    def _name_key(patient: Patient) -> Optional[Tuple[str, str]]:
+        if patient.first_name and patient.last_name:
+            return (patient.first_name.lower(), patient.last_name.lower())
         return None
     
+    @classmethod
+    def _extracted_key(cls, patient: Patient) -> Optional[Tuple[str, str, Optional[str]]]:
+        """upsert_patient() dedup key, matching the unique extracted patient index in MongoDB."""
+        name_key = cls._name_key(patient)
+        if name_key is None or not isinstance(patient.extracted_from, str):
+            return None
+        return name_key + (patient.date_of_birth,)
+    
+    def _reindex_name(self, patient: Patient, old_key: Optional[Tuple[str, str]]):
+        """Index patient under its current name, releasing old_key if the patient held it."""
+        new_key = self._name_key(patient)
+        if new_key == old_key:
+            return
+        if old_key is not None and self.patient_names.get(old_key) is patient:
+            del self.patient_names[old_key]
+            # Renames are rare, so a scan for the next holder of the old name is fine
+            for other in self.patients.values():
+                if self._name_key(other) == old_key:
+                    self.patient_names.setdefault(old_key, other)
+                    break
+        if new_key is not None:
+            self.patient_names.setdefault(new_key, patient)
+    
+    def find_patient_by_name(self, first_name: str, last_name: str) -> Optional[Patient]:
+        return self.patient_names.get((first_name.lower(), last_name.lower()))
+    
+    def search_patients_by_prefix(self, first_name: str, last_name: Optional[str] = None,
+                                  limit: int = 10) -> List[Dict[str, Any]]:
+        first_name = first_name.lower()
+        if last_name is None:
+            matches = [p for p in self.patients.values()
+                       if p.first_name and p.first_name.lower().startswith(first_name)]
+        else:
+            last_name = last_name.lower()
+            matches = [p for p in self.patients.values()
+                       if p.first_name and p.first_name.lower() == first_name
+                       and p.last_name and p.last_name.lower().startswith(last_name)]
+        matches.sort(key=lambda p: (p.first_name.lower(), (p.last_name or '').lower()))
+        return [patient.to_dict() for patient in matches[:limit]]
+    
+    def upsert_patient(self, first_name: str, last_name: str, date_of_birth: Optional[str] = None,
+                       extracted_from: Optional[str] = None) -> Tuple[Optional[str], bool]:
+        patient = Patient(
+            first_name=first_name,
+            last_name=last_name,
+            date_of_birth=date_of_birth,
+            extracted_from=extracted_from
+        )
+        # Like the partial unique index in MongoDB, only patients with a
+        # source document are deduplicated; dict.setdefault is atomic, so
+        # concurrent workers agree on one record
+        extracted_key = self._extracted_key(patient)
+        if extracted_key is not None:
+            existing = self.extracted_patients.setdefault(extracted_key, patient)
+            if existing is not patient:
+                return existing.id, False
+        self.patients[patient.id] = patient
+        name_key = self._name_key(patient)
+        if name_key is not None:
+            self.patient_names.setdefault(name_key, patient)
+        self.log_activity('CREATE', 'patient', patient.id)
+        return patient.id, True
+    
     # Order operations
     def create_order(self, order: Order) -> bool:
         self.orders[order.id] = order
+        if order.patient_id:
+            self.orders_by_patient[order.patient_id].append(order)
         self.log_activity('CREATE', 'order', order.id)
         return True
     
+    def create_orders_bulk(self, orders: List[Order]) -> List[str]:
+        self.orders.update((order.id, order) for order in orders)
+        for order in orders:
+            if order.patient_id:
+                self.orders_by_patient[order.patient_id].append(order)
+        ids = [order.id for order in orders]
+        self._log_created('order', ids)
+        return ids
+    
     def get_order(self, order_id: str) -> Optional[Order]:
         return self.orders.get(order_id)
     
     def get_orders(self, skip: int = 0, limit: int = 10) -> List[Order]:
-        order_list = list(self.orders.values())
-        return order_list[skip:skip+limit]
+        return list(islice(self.orders.values(), skip, skip+limit))
+    
+    def get_orders_by_patient(self, patient_id: str, fields: Optional[List[str]] = None) -> List[Order]:
+        orders = self.orders_by_patient.get(patient_id, ())
+        return sorted(orders, key=lambda order: order.created_at, reverse=True)
+    
+    def get_orders_after(self, cursor: Optional[str] = None, limit: int = 10,
+                         fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        records = [order.to_dict() for order in self.orders.values()]
+        orders, next_after = self._paginate(records, 'created_at', after, limit)
+        return orders, encode_cursor(*next_after) if next_after else None
     
-    def update_order(self, order_id: str, updates: Dict[str, Any]) -> bool:
+    def update_order(self, order_id: str, updates: Dict[str, Any]) -> Optional[Order]:
         if order_id in self.orders:
             order = self.orders[order_id]
+            old_patient_id = order.patient_id
             for key, value in updates.items():
                 if hasattr(order, key):
                     setattr(order, key, value)
+            if order.patient_id != old_patient_id:
+                if old_patient_id:
+                    self.orders_by_patient[old_patient_id].remove(order)
+                if order.patient_id:
+                    self.orders_by_patient[order.patient_id].append(order)
             order.updated_at = datetime.utcnow()
             self.log_activity('UPDATE', 'order', order_id, updates)
-            return True
-        return False
+            return order
+        return None
     
     def delete_order(self, order_id: str) -> bool:
         if order_id in self.orders:
-            del self.orders[order_id]
+            order = self.orders.pop(order_id)
+            if order.patient_id:
+                self.orders_by_patient[order.patient_id].remove(order)
             self.log_activity('DELETE', 'order', order_id)
             return True
         return False
@@ -85,28 +253,71 @@ class InMemoryDatabase:
     # Document operations
     def create_document(self, document: Document) -> bool:
         self.documents[document.id] = document
+        if document.order_id:
+            self.documents_by_order[document.order_id].append(document)
         self.log_activity('CREATE', 'document', document.id)
         return True
     
+    def create_documents_bulk(self, documents: List[Document]) -> List[str]:
+        self.documents.update((document.id, document) for document in documents)
+        for document in documents:
+            if document.order_id:
+                self.documents_by_order[document.order_id].append(document)
+        ids = [document.id for document in documents]
+        self._log_created('document', ids)
+        return ids
+    
     def get_document(self, document_id: str) -> Optional[Document]:
         return self.documents.get(document_id)
     
     def update_document(self, document_id: str, updates: Dict[str, Any]) -> bool:
         if document_id in self.documents:
             document = self.documents[document_id]
+            old_order_id = document.order_id
             for key, value in updates.items():
                 if hasattr(document, key):
                     setattr(document, key, value)
+            if document.order_id != old_order_id:
+                if old_order_id:
+                    self.documents_by_order[old_order_id].remove(document)
+                if document.order_id:
+                    self.documents_by_order[document.order_id].append(document)
             document.updated_at = datetime.utcnow()
-            self.log_activity('UPDATE', 'document', document_id, updates)
+            # Log field names only; the update can carry the full extracted text
+            self.log_activity('UPDATE', 'document', document_id, {'fields': sorted(updates)})
             return True
         return False
     
-    def get_documents_by_order(self, order_id: str) -> List[Document]:
-        return [doc for doc in self.documents.values() if doc.order_id == order_id]
+    def iter_documents_by_order(self, order_id: str, fields: Optional[List[str]] = None) -> Iterator[Document]:
+        return iter(self.get_documents_by_order(order_id, fields))
+    
+    def get_documents_by_order(self, order_id: str, fields: Optional[List[str]] = None) -> List[Document]:
+        documents = self.documents_by_order.get(order_id, ())
+        return sorted(documents, key=lambda doc: doc.created_at, reverse=True)
     
     def get_activity_logs(self, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
-        return self.activity_logs[skip:skip+limit]
+        return list(islice(self.activity_logs, skip, skip+limit))
+    
+    def get_activity_logs_after(self, cursor: Optional[str] = None, limit: int = 50,
+                                fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            after = (coerce_datetime(after[0], default_now=False), after[1])
+        logs, next_after = self._paginate(list(self.activity_logs), 'timestamp', after, limit)
+        return logs, encode_cursor(*next_after) if next_after else None
 
 # Global instance for testing
-memory_db = InMemoryDatabase()
\ No newline at end of file
+memory_db = InMemoryDatabase()
+
+# Methods bound onto db_service when MongoDB is unavailable
+PUBLIC_API = (
+    'log_activity',
+    'create_patient', 'create_patients_bulk', 'get_patient', 'get_patients',
+    'get_patients_page', 'get_patients_after', 'update_patient', 'find_patient_by_name',
+    'search_patients_by_prefix', 'upsert_patient',
+    'create_order', 'create_orders_bulk', 'get_order', 'get_orders', 'get_orders_by_patient',
+    'get_orders_after', 'update_order', 'delete_order',
+    'create_document', 'create_documents_bulk', 'get_document', 'update_document', 'get_documents_by_order',
+    'iter_documents_by_order',
+    'get_activity_logs', 'get_activity_logs_after',
+)
@@ -0,0 +1,92 @@
+"""Background processing for uploaded documents."""
+
+import os
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.models.document import Document
+from app.services.database import db_service
+
+logger = logging.getLogger(__name__)
+
+# Worker pool that runs OCR off the request thread
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('OCR_WORKERS', 4)),
+    thread_name_prefix='ocr'
+)
+
+_processor = None
+
+def get_document_processor():
+    """Get the shared document processor, creating it on first use."""
+    global _processor
+    if _processor is None:
+        from app.services.document_processor import DocumentProcessor
+        _processor = DocumentProcessor(
+            tesseract_path=os.getenv('TESSERACT_PATH'),
+            poppler_path=os.getenv('POPPLER_PATH')
+        )
+    return _processor
+
+def process_document_task(document_id: str, file_path: str):
+    """Run extraction for a stored document and persist the result."""
+    document = db_service.get_document(document_id)
+    if not document:
+        logger.error(f"Document {document_id} not found for processing")
+        return
+    
+    # The document stays 'uploaded' until a single terminal write below
+    try:
+        processing_result = get_document_processor().process_document(file_path)
+        
+        if not processing_result['success']:
+            _mark_failed(document, processing_result['error_message'])
+            return
+        
+        # Update document with extracted data
+        document.set_extracted_data(
+            processing_result['extracted_text'],
+            processing_result['patient_data'],
+            processing_result['confidence_scores']
+        )
+        document.processing_time = processing_result['processing_time']
+        document.update_status(Document.STATUS_COMPLETED)
+        
+        # Link to an existing patient with this name and date of birth or create one
+        patient_data = processing_result['patient_data']
+        if patient_data.get('first_name') and patient_data.get('last_name'):
+            patient_id, created = db_service.upsert_patient(
+                patient_data['first_name'],
+                patient_data['last_name'],
+                date_of_birth=patient_data.get('date_of_birth'),
+                extracted_from=document.filename
+            )
+            if patient_id:
+                logger.info(f"{'Created new' if created else 'Found existing'} patient: {patient_id}")
+        
+        # Update document in database
+        db_service.update_document(document.id, {
+            'status': document.status,
+            'extracted_text': document.extracted_text,
+            'patient_data': document.patient_data,
+            'confidence_scores': document.confidence_scores,
+            'processing_time': document.processing_time,
+            'processed_at': document.processed_at
+        })
+    
+    except Exception as e:
+        logger.error(f"Error processing document {document_id}: {str(e)}")
+        _mark_failed(document, str(e))
+
+def _mark_failed(document: Document, error_message: str):
+    """Persist the failed terminal state in one update."""
+    document.update_status(Document.STATUS_FAILED, error_message)
+    db_service.update_document(document.id, {
+        'status': document.status,
+        'error_message': document.error_message,
+        'processed_at': document.processed_at
+    })
+
+def enqueue_document_processing(document_id: str, file_path: str) -> Future:
+    """Queue a stored document for background processing."""
+    return _executor.submit(process_document_task, document_id, file_path)
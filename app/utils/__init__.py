@@ -1,6 +1,13 @@
 """Utility initialization module."""
 
 from .helpers import (
+    random_uuid,
+    request_utcnow,
+    coerce_datetime,
+    encode_cursor,
+    decode_cursor,
+    parse_fields,
+    select_fields,
     generate_unique_filename,
     validate_file_size,
     clean_extracted_text,
@@ -13,6 +20,13 @@ from .helpers import (
 )
 
 __all__ = [
+    'random_uuid',
+    'request_utcnow',
+    'coerce_datetime',
+    'encode_cursor',
+    'decode_cursor',
+    'parse_fields',
+    'select_fields',
     'generate_unique_filename',
     'validate_file_size', 
     'clean_extracted_text',
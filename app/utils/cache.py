@@ -0,0 +1,67 @@
+"""Small thread-safe LRU cache with per-entry expiry."""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class TTLCache:
+    """Keep up to maxsize entries, each for at most ttl seconds.
+    
+    The least recently used entry is evicted when the cache is full.
+    Every removal bumps a generation counter, so a value read from the
+    source before an invalidation is not cached after it.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+    
+    @property
+    def generation(self) -> int:
+        """Take before reading the source; pass to set() to drop the value if anything was invalidated since."""
+        return self._generation
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+    
+    def discard_if(self, predicate: Callable[[Any], bool]):
+        """Drop every entry whose value matches predicate."""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
@@ -2,9 +2,111 @@
 
 import os
 import re
+import sys
+import base64
+import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import uuid
+import orjson
+from flask import g, has_request_context
+
+# Patterns used by the text and validation helpers below, compiled once
+# Whitespace and OCR artifacts alike: anything but word characters and kept punctuation
+_CLEANUP_RE = re.compile(r'[^\w\-\/\.:,()&]+')
+# Leftmost date wins; at the same position YYYY/MM/DD is tried before MM/DD/YY(YY)
+_DOB_RE = re.compile(
+    r'(?<!\d)(?P<iso_year>\d{4})[\/\-](?P<iso_month>\d{1,2})[\/\-](?P<iso_day>\d{1,2})'  # YYYY/MM/DD or YYYY-MM-DD
+    r'|(?P<month>\d{1,2})[\/\-](?P<day>\d{1,2})[\/\-](?P<year>\d{4}|\d{2})'     # MM/DD/YYYY or MM/DD/YY
+)
+_NAME_CHARS_RE = re.compile(r'^[a-zA-Z\s\-\'\.]+$')
+_DOB_FORMAT_RE = re.compile(r'^\d{2}/\d{2}/\d{4}$')
+
+# Python 3.11+ fromisoformat() accepts a trailing 'Z' directly
+_ISO_HAS_Z = sys.version_info >= (3, 11)
+
+# Per-thread buffer of random bytes handed out 16 at a time by random_uuid()
+_uuid_pool = threading.local()
+_UUID_POOL_SIZE = 256
+
+# A forked child must not hand out the random bytes its parent still holds
+os.register_at_fork(after_in_child=lambda: _uuid_pool.__dict__.clear())
+
+def random_uuid() -> uuid.UUID:
+    """Equivalent of uuid.uuid4() that reads the OS RNG once per 256 ids."""
+    pool = _uuid_pool
+    buffer = getattr(pool, 'buffer', b'')
+    offset = getattr(pool, 'offset', 0)
+    if offset >= len(buffer):
+        buffer = pool.buffer = os.urandom(16 * _UUID_POOL_SIZE)
+        offset = 0
+    pool.offset = offset + 16
+    return uuid.UUID(bytes=buffer[offset:offset + 16], version=4)
+
+def request_utcnow() -> datetime:
+    """Get the current UTC time, cached for the duration of a request."""
+    if not has_request_context():
+        return datetime.utcnow()
+    
+    now = g.get('_utcnow')
+    if now is None:
+        now = g._utcnow = datetime.utcnow()
+    return now
+
+def coerce_datetime(value: Any, default_now: bool = True) -> Optional[datetime]:
+    """Convert a stored ISO string or datetime to a datetime."""
+    if isinstance(value, str):
+        if _ISO_HAS_Z:
+            return datetime.fromisoformat(value)
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        return value
+    return datetime.utcnow() if default_now else None
+
+def encode_cursor(sort_value: Any, record_id: str) -> str:
+    """Encode the sort key of the last record on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(orjson.dumps([sort_value, record_id])).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a page cursor; raises ValueError if it is malformed.
+    
+    The sort value must be a naive ISO timestamp, like every stored
+    created_at/timestamp, so it compares against them and can never
+    carry a query operator.
+    """
+    try:
+        value = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid page cursor')
+    if not (isinstance(value, list) and len(value) == 2
+            and isinstance(value[0], str) and isinstance(value[1], str)):
+        raise ValueError('Invalid page cursor')
+    try:
+        timestamp = coerce_datetime(value[0])
+    except ValueError:
+        raise ValueError('Invalid page cursor')
+    if timestamp.tzinfo is not None:
+        raise ValueError('Invalid page cursor')
+    return value[0], value[1]
+
+def parse_fields(raw: Optional[str], allowed: frozenset) -> Optional[List[str]]:
+    """Parse a comma-separated ?fields= selection; raises ValueError for unknown names.
+    
+    'id' is always included. Returns None when no selection was given.
+    """
+    if not raw:
+        return None
+    fields = list(dict.fromkeys(['id'] + [f.strip() for f in raw.split(',') if f.strip()]))
+    unknown = set(fields) - allowed
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+def select_fields(records: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Trim records to the fields chosen with parse_fields(); no-op without a selection."""
+    if not fields:
+        return records
+    return [{field: record.get(field) for field in fields} for record in records]
 
 def generate_unique_filename(original_filename: str) -> str:
     """Generate a unique filename with timestamp."""
@@ -26,16 +128,9 @@ def clean_extracted_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove common OCR artifacts
-    text = re.sub(r'[^\w\s\-\/\.:,()&]', ' ', text)
-    
-    # Normalize line breaks
-    text = re.sub(r'\n\s*\n', '\n', text)
-    
-    return text.strip()
+    # Replace each run of whitespace and OCR artifacts, line breaks
+    # included, with a single space in one pass
+    return _CLEANUP_RE.sub(' ', text).strip()
 
 def normalize_patient_name(name: str) -> str:
     """Normalize patient name for consistency."""
@@ -57,43 +152,23 @@ def format_date_of_birth(dob_str: str) -> Optional[str]:
     if not dob_str:
         return None
     
-    # Common date patterns
-    patterns = [
-        r'(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})',  # MM/DD/YYYY or MM-DD-YYYY
-        r'(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{2})',   # MM/DD/YY or MM-DD-YY
-        r'(\d{4})[\/\-](\d{1,2})[\/\-](\d{1,2})',   # YYYY/MM/DD or YYYY-MM-DD
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, dob_str)
-        if match:
-            parts = match.groups()
-            
-            if len(parts[2]) == 4:  # Full year
-                if len(parts[0]) == 4:  # YYYY/MM/DD format
-                    year, month, day = parts
-                else:  # MM/DD/YYYY format
-                    month, day, year = parts
-            else:  # 2-digit year
-                month, day, year_short = parts
-                year_int = int(year_short)
-                # Assume years > 50 are 19xx, others are 20xx
-                if year_int > 50:
-                    year = f"19{year_short}"
-                else:
-                    year = f"20{year_short}"
-            
-            # Validate month and day
-            try:
-                month_int = int(month)
-                day_int = int(day)
-                
-                if 1 <= month_int <= 12 and 1 <= day_int <= 31:
-                    return f"{month.zfill(2)}/{day.zfill(2)}/{year}"
-            except ValueError:
-                continue
+    match = _DOB_RE.search(dob_str)
+    if not match:
+        return dob_str  # Return original if no pattern matched
+    
+    if match.group('iso_year'):
+        year, month, day = match.group('iso_year', 'iso_month', 'iso_day')
+    else:
+        month, day, year = match.group('month', 'day', 'year')
+        if len(year) == 2:
+            # Assume years > 50 are 19xx, others are 20xx
+            year = f"19{year}" if int(year) > 50 else f"20{year}"
+    
+    # Validate month and day
+    if 1 <= int(month) <= 12 and 1 <= int(day) <= 31:
+        return f"{month.zfill(2)}/{day.zfill(2)}/{year}"
     
-    return dob_str  # Return original if no pattern matched
+    return dob_str
 
 def calculate_processing_stats(documents: list) -> Dict[str, Any]:
     """Calculate processing statistics for a list of documents."""
@@ -108,14 +183,23 @@ def calculate_processing_stats(documents: list) -> Dict[str, Any]:
         }
     
     total = len(documents)
-    completed = sum(1 for doc in documents if doc.status == 'completed')
-    processing = sum(1 for doc in documents if doc.status == 'processing')
-    failed = sum(1 for doc in documents if doc.status == 'failed')
+    completed = processing = failed = 0
+    time_sum, time_count = 0.0, 0
     
-    # Calculate average processing time for completed documents
-    processing_times = [doc.processing_time for doc in documents 
-                       if doc.processing_time and doc.status == 'completed']
-    avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
+    # Tally statuses and completed processing times in a single pass
+    for doc in documents:
+        status = doc.status
+        if status == 'completed':
+            completed += 1
+            if doc.processing_time:
+                time_sum += doc.processing_time
+                time_count += 1
+        elif status == 'processing':
+            processing += 1
+        elif status == 'failed':
+            failed += 1
+    
+    avg_processing_time = time_sum / time_count if time_count else 0
     
     success_rate = (completed / total * 100) if total > 0 else 0
     
@@ -157,7 +241,7 @@ def validate_patient_data(patient_data: Dict[str, Any]) -> Dict[str, str]:
         errors['first_name'] = 'First name is required'
     elif len(first_name) < 2 or len(first_name) > 50:
         errors['first_name'] = 'First name must be between 2 and 50 characters'
-    elif not re.match(r'^[a-zA-Z\s\-\'\.]+$', first_name):
+    elif not _NAME_CHARS_RE.match(first_name):
         errors['first_name'] = 'First name contains invalid characters'
     
     # Check last name
@@ -166,13 +250,13 @@ def validate_patient_data(patient_data: Dict[str, Any]) -> Dict[str, str]:
         errors['last_name'] = 'Last name is required'
     elif len(last_name) < 2 or len(last_name) > 50:
         errors['last_name'] = 'Last name must be between 2 and 50 characters'
-    elif not re.match(r'^[a-zA-Z\s\-\'\.]+$', last_name):
+    elif not _NAME_CHARS_RE.match(last_name):
         errors['last_name'] = 'Last name contains invalid characters'
     
     # Check date of birth
     dob = patient_data.get('date_of_birth', '').strip()
     if dob:
-        if not re.match(r'^\d{2}/\d{2}/\d{4}$', dob):
+        if not _DOB_FORMAT_RE.match(dob):
             errors['date_of_birth'] = 'Date of birth must be in MM/DD/YYYY format'
         else:
             try:
@@ -183,63 +267,65 @@ def validate_patient_data(patient_data: Dict[str, Any]) -> Dict[str, str]:
     
     return errors
 
+# Processing details per file extension, built once
+_FILE_TYPES = {
+    '.pdf': {
+        'supported': True,
+        'type': 'pdf',
+        'description': 'Portable Document Format',
+        'ocr_required': True,
+        'preprocessing': 'pdf_to_image'
+    },
+    '.png': {
+        'supported': True,
+        'type': 'image',
+        'description': 'Portable Network Graphics',
+        'ocr_required': True,
+        'preprocessing': 'image_enhancement'
+    },
+    '.jpg': {
+        'supported': True,
+        'type': 'image',
+        'description': 'JPEG Image',
+        'ocr_required': True,
+        'preprocessing': 'image_enhancement'
+    },
+    '.jpeg': {
+        'supported': True,
+        'type': 'image',
+        'description': 'JPEG Image',
+        'ocr_required': True,
+        'preprocessing': 'image_enhancement'
+    },
+    '.tiff': {
+        'supported': True,
+        'type': 'image',
+        'description': 'Tagged Image File Format',
+        'ocr_required': True,
+        'preprocessing': 'image_enhancement'
+    },
+    '.tif': {
+        'supported': True,
+        'type': 'image',
+        'description': 'Tagged Image File Format',
+        'ocr_required': True,
+        'preprocessing': 'image_enhancement'
+    },
+    '.docx': {
+        'supported': True,
+        'type': 'document',
+        'description': 'Microsoft Word Document',
+        'ocr_required': False,
+        'preprocessing': 'text_extraction'
+    }
+}
+_UNKNOWN_FILE_TYPE = {'supported': False, 'type': 'unknown'}
+
 def get_file_type_info(filename: str) -> Dict[str, Any]:
     """Get information about file type and processing requirements."""
     if not filename:
-        return {'supported': False, 'type': 'unknown'}
+        return dict(_UNKNOWN_FILE_TYPE)
     
     ext = os.path.splitext(filename)[1].lower()
-    
-    file_types = {
-        '.pdf': {
-            'supported': True,
-            'type': 'pdf',
-            'description': 'Portable Document Format',
-            'ocr_required': True,
-            'preprocessing': 'pdf_to_image'
-        },
-        '.png': {
-            'supported': True,
-            'type': 'image',
-            'description': 'Portable Network Graphics',
-            'ocr_required': True,
-            'preprocessing': 'image_enhancement'
-        },
-        '.jpg': {
-            'supported': True,
-            'type': 'image',
-            'description': 'JPEG Image',
-            'ocr_required': True,
-            'preprocessing': 'image_enhancement'
-        },
-        '.jpeg': {
-            'supported': True,
-            'type': 'image',
-            'description': 'JPEG Image',
-            'ocr_required': True,
-            'preprocessing': 'image_enhancement'
-        },
-        '.tiff': {
-            'supported': True,
-            'type': 'image',
-            'description': 'Tagged Image File Format',
-            'ocr_required': True,
-            'preprocessing': 'image_enhancement'
-        },
-        '.tif': {
-            'supported': True,
-            'type': 'image',
-            'description': 'Tagged Image File Format',
-            'ocr_required': True,
-            'preprocessing': 'image_enhancement'
-        },
-        '.docx': {
-            'supported': True,
-            'type': 'document',
-            'description': 'Microsoft Word Document',
-            'ocr_required': False,
-            'preprocessing': 'text_extraction'
-        }
-    }
-    
-    return file_types.get(ext, {'supported': False, 'type': 'unknown'})
\ No newline at end of file
+    # Copied so callers cannot change the shared table
+    return dict(_FILE_TYPES.get(ext, _UNKNOWN_FILE_TYPE))
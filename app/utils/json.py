@@ -0,0 +1,40 @@
+"""orjson-backed JSON support for Flask responses."""
+
+import decimal
+from typing import Any, Dict, Iterable, Iterator, Union
+
+import orjson
+from flask import Response
+from flask.json.provider import JSONProvider
+
+# Naive datetimes in this app are always UTC (datetime.utcnow())
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+def _default(obj: Any) -> Any:
+    """Serialize the types Flask's default provider handles but orjson does not."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that encodes and decodes with orjson."""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS).decode()
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # Hand orjson's bytes straight to the response instead of
+        # decoding to str only for Werkzeug to encode it again
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS)
+        return self._app.response_class(body, mimetype='application/json')
+
+def iter_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON, one line per record."""
+    for record in records:
+        yield orjson.dumps(record, default=_default, option=_DUMPS_OPTIONS | orjson.OPT_APPEND_NEWLINE)
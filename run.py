@@ -1,22 +1,10 @@
 import os
 from app import create_app
-from app.services.database import db_service
 
-def initialize_database():
-    """Initialize database with the Flask app context."""
-    app = create_app()
-    
-    with app.app_context():
-        # Initialize database service with the app's database
-        if hasattr(app, 'db'):
-            db_service.init_db(app.db)
-            print("Database initialized successfully")
-        else:
-            print("Warning: Database connection not established")
+# Module-level so WSGI servers can load it as run:app
+app = create_app()
 
 if __name__ == '__main__':
-    app = create_app()
-    
     # Run the application
     debug_mode = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
     port = int(os.environ.get('PORT', 5002))